@@ -1,12 +1,22 @@
 import os
+import hashlib
 import logging
-from flask import Flask, request, render_template, jsonify, redirect, url_for
-import threading
+import re
+import signal
+import sys
+from flask import Flask, Response, request, render_template, jsonify, redirect, url_for, stream_with_context
 import time
-import json
+import traceback
 from datetime import datetime
-from scraper import scrapeCourses
-from notifier import send_email
+from config import Config
+import metrics
+from monitor import create_monitor
+from search import SearchIndex, scan_sections
+from events import SeatEventBroker
+from page_cache import PageCache
+from registrar_guard import get_registrar_guard
+from rules import describe_rule, make_rule
+from store import seat_openings
 
 app = Flask(__name__)
 
@@ -14,217 +24,484 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Production configuration
-class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-    DEBUG = os.environ.get('FLASK_ENV') == 'development'
-    PORT = int(os.environ.get('PORT', 5000))
-
 app.config.from_object(Config)
 
-# In-memory storage for user requests (you can replace this with a database later)
-user_requests = []
-active_monitors = {}  # Track active monitoring threads
-
-# File to persist user requests
+# Legacy JSON file, imported into the database once on first start
 DATA_FILE = "user_requests.json"
 
-def load_user_requests():
-    """Load user requests from JSON file"""
-    global user_requests
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r') as f:
-                user_requests = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            user_requests = []
-    else:
-        user_requests = []
+# Poller and email senders; they only run in the process holding the leader lease
+# (the scraping stack is imported on the first scrape, not at startup)
+monitor = create_monitor(Config, legacy_json=DATA_FILE)
 
-def save_user_requests():
-    """Save user requests to JSON file"""
-    with open(DATA_FILE, 'w') as f:
-        json.dump(user_requests, f, indent=2)
+# User requests live in SQLite, indexed by CRN and email
+user_requests = monitor.subscriptions
 
-def check_course_availability(crn, user_data):
-    """Background function to check course availability for a specific user"""
-    print(f"Starting monitoring for CRN {crn} for user {user_data['email']}")
-    
-    while crn in active_monitors:
-        try:
-            # Scrape current course data
-            courses = scrapeCourses()
-            
-            if crn in courses and courses[crn]['available_seats'] > 0:
-                # Course is available! Send notification
-                course_info = courses[crn]
-                subject = f"🎉 Seat Available in {course_info['subject']} {course_info['course_number']}"
-                
-                body = f"""Hi {user_data['name']},
-
-Great news! A seat has become available in your requested course:
-
-Course: {course_info['subject']} {course_info['course_number']} - {course_info['title']}
-CRN: {crn}
-Available Seats: {course_info['available_seats']}
-Instructor: {course_info['instructor']}
-Schedule: {course_info['days']} at {course_info['time']}
-
-Please log into your student portal immediately to register for this course.
-
-Best of luck!
-Open Seat Notification System
-"""
-                
-                send_email(user_data['email'], subject, body)
-                print(f"Notification sent to {user_data['email']} for CRN {crn}")
-                
-                # Remove from active monitoring and user requests
-                if crn in active_monitors:
-                    del active_monitors[crn]
-                
-                # Remove the user request from the list
-                global user_requests
-                user_requests = [req for req in user_requests if not (req['crn'] == crn and req['email'] == user_data['email'])]
-                save_user_requests()
-                
-                break
-            else:
-                # Course not available, continue monitoring
-                available_seats = courses.get(crn, {}).get('available_seats', 0)
-                print(f"CRN {crn} still has {available_seats} seats. Continuing to monitor...")
-                
-        except Exception as e:
-            print(f"Error checking course availability for CRN {crn}: {str(e)}")
-        
-        # Wait before checking again (5 minutes)
-        time.sleep(300)  # 300 seconds = 5 minutes
-    
-    print(f"Stopped monitoring CRN {crn}")
+# Every page, API call and the poller read the catalog through this one cache
+catalog_cache = monitor.cache
+
+# Prefix index for CRN / course autocomplete, patched on every published snapshot
+search_index = SearchIndex()
+catalog_cache.add_listener(search_index.update)
+
+# Pushes seat changes to /status pages as soon as a snapshot is published
+broker = SeatEventBroker(catalog_cache, load_newer=monitor.source.load_newer, max_clients=Config.MAX_EVENT_STREAMS)
+
+# Rendered /status pages and /api/status payloads, keyed by subscription revision and catalog version
+status_cache = PageCache()
+
+notifier = monitor.notifier
+metrics.NOTIFICATION_QUEUE_DEPTH.set_function(notifier.outbox.depth)
+
+def watched_crns():
+    """CRNs that currently have at least one subscriber, if a poller is alive in any process"""
+    if monitor.leader() is None:
+        return []
+    return user_requests.crns()
+
+def with_course_info(subscriptions):
+    """Attach each subscription's current catalog entry as `course_info`.
+
+    Subscriptions only store the CRN, so every row for a section shares one
+    Course record. Rows whose CRN left the catalog fall back to whatever was
+    stored with them (older subscriptions) or nothing.
+    """
+    catalog = catalog_cache.snapshot
+    for user_data in subscriptions:
+        course = catalog.get(user_data['crn']) if catalog else None
+        if course is not None:
+            user_data['course_info'] = course
+    return subscriptions
+
+def get_catalog():
+    """Cached catalog snapshot; raises if no catalog data could be loaded"""
+    snapshot = catalog_cache.get()
+    if snapshot is None:
+        raise RuntimeError("Course catalog is unavailable")
+    return snapshot
+
+@app.context_processor
+def poll_cadence():
+    """How often seats are checked, for page copy: the interval adapts between these bounds"""
+    low, high = Config.POLL_MIN_INTERVAL, Config.POLL_MAX_INTERVAL
+    span = f"every {low / 60:g} to {high / 60:g} minutes" if low >= 60 else f"every {low} seconds to {high / 60:g} minutes"
+    return {'poll_cadence': f"{span}, "
+                            "more often while seats are changing or registration is open"}
 
 @app.route('/')
 def index():
     """Main page with the form"""
     return render_template('index.html')
 
+# A course code such as "ECO 201" in place of CRNs means every section of that course
+COURSE_CODE = re.compile(r'^([A-Za-z]{2,5})\s*-?\s*(\d{3}[A-Za-z]?)$')
+
+def parse_crn_field(text):
+    """(crns, subject, course_number) from the form's CRN field: CRNs separated by commas
+    or spaces, or one course code"""
+    match = COURSE_CODE.match(text.strip())
+    if match:
+        return [], match.group(1).upper(), match.group(2).upper()
+    return [crn for crn in re.split(r'[\s,;]+', text) if crn], None, None
+
+def resolve_sections(catalog, crns=(), subject=None, course_number=None):
+    """Check requested CRNs, or every section of a course, against one catalog snapshot.
+
+    Returns ([(crn, course)] found, [requested CRNs or course code not found]).
+    """
+    if subject:
+        if search_index.version == catalog.version:
+            crns = search_index.sections(subject, course_number)
+        else:
+            # The index is patched after each publish, so it may still describe an older catalog
+            crns = scan_sections(catalog.courses, subject, course_number)
+        found = [(crn, catalog.get(crn)) for crn in crns if crn in catalog]
+        return found, [] if found else [f"{subject} {course_number}"]
+
+    found, missing, seen = [], [], set()
+    for crn in crns:
+        crn = str(crn).strip()
+        if not crn or crn in seen:
+            continue
+        seen.add(crn)
+        course = catalog.get(crn)
+        if course is None:
+            missing.append(crn)
+        else:
+            found.append((crn, course))
+    return found, missing
+
+def subscribe_sections(name, email, phone, sections):
+    """Subscribe one user to several sections in one transaction.
+
+    Returns ([(crn, course)] newly subscribed, [crn] already subscribed).
+    """
+    timestamp = datetime.now().isoformat()
+    # Course details are looked up in the catalog, not copied
+    added = user_requests.add_many([{'name': name, 'email': email, 'phone': phone, 'crn': crn,
+                                     'timestamp': timestamp} for crn, _ in sections])
+    subscribed = [section for section, new in zip(sections, added) if new]
+    duplicates = [crn for (crn, _), new in zip(sections, added) if not new]
+    if subscribed:
+        # The poller picks them up from the database on its next cycle
+        monitor.subscriptions_changed()
+    return subscribed, duplicates
+
+def not_found_message(missing):
+    if not missing:
+        return "No matching sections found in the course catalog."
+    message = f"CRN {missing[0]} not found in the course catalog." if len(missing) == 1 else \
+        f"Not found in the course catalog: {', '.join(missing)}."
+    suggestions = ", ".join(f"{match} ({course['subject']} {course['course_number']})"
+                            for match, course in search_index.search(missing[0], limit=3))
+    if suggestions:
+        message += f" Did you mean {suggestions}?"
+    return message
+
 @app.route('/submit', methods=['POST'])
 def submit_request():
-    """Handle form submission"""
+    """Handle form submission for one or more CRNs, or every section of a course"""
     try:
         # Get form data
         name = request.form.get('name', '').strip()
         email = request.form.get('email', '').strip()
         phone = request.form.get('phone', '').strip()
-        crn = request.form.get('crn', '').strip()
+        crn_field = request.form.get('crn', '').strip()
         
         # Basic validation
-        if not all([name, email, crn]):
+        if not all([name, email, crn_field]):
             return render_template('index.html', error="Please fill in all required fields.")
+        crns, subject, course_number = parse_crn_field(crn_field)
+        if not crns and not subject:
+            return render_template('index.html', error="Please enter at least one CRN or a course code such as ECO 201.")
         
-        # Check if CRN exists in the course catalog
+        # Check every requested CRN against the same catalog snapshot
         try:
-            courses = scrapeCourses()
-            if crn not in courses:
-                return render_template('index.html', error=f"CRN {crn} not found in the course catalog.")
+            catalog = get_catalog()
+            sections, missing = resolve_sections(catalog, crns, subject, course_number)
+            if not sections:
+                return render_template('index.html', error=not_found_message(missing))
         except Exception as e:
             return render_template('index.html', error="Error accessing course catalog. Please try again later.")
         
-        # Check if already monitoring this CRN for this user
-        existing_request = next((req for req in user_requests if req['crn'] == crn and req['email'] == email), None)
-        if existing_request:
-            return render_template('index.html', error="You are already monitoring this course.")
-        
-        # Create user request
-        user_data = {
-            'name': name,
-            'email': email,
-            'phone': phone,
-            'crn': crn,
-            'timestamp': datetime.now().isoformat(),
-            'course_info': courses[crn]
-        }
-        
-        # Add to user requests
-        user_requests.append(user_data)
-        save_user_requests()
-        
-        # Start monitoring thread if not already active for this CRN
-        if crn not in active_monitors:
-            monitor_thread = threading.Thread(target=check_course_availability, args=(crn, user_data), daemon=True)
-            active_monitors[crn] = monitor_thread
-            monitor_thread.start()
+        # Add to user requests unless already monitoring a CRN for this user
+        subscribed, duplicates = subscribe_sections(name, email, phone, sections)
+        if not subscribed:
+            if len(duplicates) == 1:
+                return render_template('index.html', error="You are already monitoring this course.")
+            return render_template('index.html', error=f"You are already monitoring CRNs {', '.join(duplicates)}.")
         
         return render_template('success.html', 
                              name=name, 
-                             crn=crn, 
-                             course_info=courses[crn])
+                             sections=subscribed,
+                             duplicates=duplicates,
+                             missing=missing,
+                             catalog_age=int(catalog.age))
         
     except Exception as e:
         return render_template('index.html', error=f"An error occurred: {str(e)}")
 
+@app.route('/api/subscriptions', methods=['POST'])
+def subscribe_batch():
+    """Subscribe to a list of CRNs ({"crns": [...]}) or a whole course ({"subject", "course_number"})"""
+    data = request.get_json(silent=True) or {}
+    name = str(data.get('name', '')).strip()
+    email = str(data.get('email', '')).strip()
+    phone = str(data.get('phone', '')).strip()
+    crns = data.get('crns') or []
+    subject = str(data.get('subject', '')).strip().upper() or None
+    course_number = str(data.get('course_number', '')).strip().upper() or None
+
+    if not name or not email or not (crns or (subject and course_number)):
+        return jsonify({'error': 'name, email and either crns or subject and course_number are required'}), 400
+    if not isinstance(crns, list):
+        return jsonify({'error': 'crns must be a list'}), 400
+    if any(isinstance(crn, bool) or not isinstance(crn, (str, int)) for crn in crns):
+        return jsonify({'error': 'Each CRN must be a string or an integer'}), 400
+
+    try:
+        catalog = get_catalog()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    sections, missing = resolve_sections(catalog, crns, subject, course_number)
+    subscribed, duplicates = subscribe_sections(name, email, phone, sections) if sections else ([], [])
+    if subscribed:
+        status = 201
+    elif duplicates:
+        status = 200  # Nothing new, but every section found is already watched
+    else:
+        status = 404  # None of the requested sections exist
+    return jsonify({
+        'catalog_version': catalog.version,
+        'subscribed': [dict(course, crn=crn) for crn, course in subscribed],
+        'already_subscribed': duplicates,
+        'not_found': missing
+    }), status
+
+def rule_json(rule):
+    return dict({field: rule[field] for field in ('rule_id', 'email', 'crn', 'subject', 'course_number',
+                                                  'instructor', 'days', 'time', 'min_seats', 'timestamp')},
+                description=describe_rule(rule))
+
+@app.route('/api/rules', methods=['POST'])
+def add_watch_rule():
+    """Watch a CRN, any section of a course or an instructor, with optional min_seats, days and time"""
+    data = request.get_json(silent=True) or {}
+    name = str(data.get('name', '')).strip()
+    email = str(data.get('email', '')).strip()
+    phone = str(data.get('phone', '')).strip()
+    if not name or not email:
+        return jsonify({'error': 'name and email are required'}), 400
+    try:
+        rule = make_rule(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rule_id = monitor.rules.add({'name': name, 'email': email, 'phone': phone}, rule)
+    if rule_id is None:
+        return jsonify({'error': 'You already have this watch rule', 'description': describe_rule(rule)}), 409
+    # The poller checks new rules against the whole catalog on its next cycle
+    monitor.subscriptions_changed()
+    return jsonify(rule_json(monitor.rules.get(rule_id))), 201
+
+@app.route('/api/rules')
+def list_watch_rules():
+    """Watch rules of one user: ?email="""
+    email = request.args.get('email', '').strip()
+    if not email:
+        return jsonify({'error': 'Pass the email whose rules to list as ?email='}), 400
+    return jsonify({'email': email, 'rules': [rule_json(rule) for rule in monitor.rules.for_email(email)]})
+
+@app.route('/api/rules/<int:rule_id>', methods=['DELETE'])
+def remove_watch_rule(rule_id):
+    """Drop a watch rule; ?email= must be the address it belongs to"""
+    rule = monitor.rules.remove(rule_id, request.args.get('email', '').strip())
+    if rule is None:
+        return jsonify({'error': 'Watch rule not found'}), 404
+    return jsonify(rule_json(rule))
+
+STATUS_PER_PAGE = 50
+
+def status_query():
+    """(crn, course, email, page, per_page) from the /status query string"""
+    return (request.args.get('crn', '').strip(),
+            request.args.get('course', '').strip().upper(),
+            request.args.get('email', '').strip(),
+            max(request.args.get('page', 1, type=int), 1),
+            min(max(request.args.get('per_page', STATUS_PER_PAGE, type=int), 1), 200))
+
+def status_page(crn, course, email, page, per_page):
+    """One page of subscriptions with their current catalog entries, plus the counts shown above it"""
+    crns = None
+    if crn:
+        crns = [crn]
+    elif course:
+        match = COURSE_CODE.match(course)
+        crns = search_index.sections(match.group(1).upper(), match.group(2).upper()) if match else []
+    matches = user_requests.count(crns, email)
+    pages = max((matches + per_page - 1) // per_page, 1)
+    page = min(page, pages)
+    monitoring = monitor.leader() is not None
+    return {
+        'subscriptions': with_course_info(user_requests.page(per_page, (page - 1) * per_page, crns, email)),
+        'total_requests': len(user_requests),
+        'active_monitors': user_requests.crn_count() if monitoring else 0,
+        'monitoring': monitoring,
+        'matches': matches,
+        'page': page,
+        'pages': pages,
+        'per_page': per_page,
+        'filters': {'crn': crn, 'course': course, 'email': email},
+    }
+
+def cached_status(kind, render):
+    """Serve a status response from status_cache, with an ETag so unchanged pages cost a 304.
+
+    The key holds everything the response depends on, so a new subscription,
+    a removal (in any process), a new catalog snapshot or the poller going
+    away each produce a fresh entry.
+    """
+    snapshot = catalog_cache.snapshot
+    query = status_query()
+    key = (kind, user_requests.revision(), snapshot.version if snapshot else 0,
+           monitor.leader() is not None) + query
+    body = status_cache.get_or_render(key, lambda: render(*query))
+    response = app.response_class(body, mimetype='application/json' if kind == 'api' else 'text/html')
+    response.set_etag(hashlib.blake2b(repr(key).encode('utf-8'), digest_size=12).hexdigest())
+    return response.make_conditional(request)
+
 @app.route('/status')
 def status():
-    """Show current monitoring status"""
-    return render_template('status.html', 
-                         user_requests=user_requests, 
-                         active_monitors=list(active_monitors.keys()))
+    """Show current monitoring status, one page of subscriptions at a time"""
+    return cached_status('html', lambda *query: render_template('status.html', **status_page(*query)))
+
+@app.route('/api/status')
+def get_status():
+    """Paginated subscriptions with their current seats; same filters as /status"""
+    def render(*query):
+        page = status_page(*query)
+        subscriptions = [{
+            'name': user_data['name'],
+            'email': user_data['email'],
+            'crn': user_data['crn'],
+            'timestamp': user_data['timestamp'],
+            'course': dict(user_data['course_info']) if user_data['course_info'] else None,
+        } for user_data in page.pop('subscriptions')]
+        snapshot = catalog_cache.snapshot
+        return app.json.dumps(dict(page, catalog_version=snapshot.version if snapshot else None,
+                                   subscriptions=subscriptions))
+    return cached_status('api', render)
+
+@app.route('/api/courses')
+def get_courses():
+    """Batch lookup: ?crns=9002,9003 or ?subject=ECO&course_number=201, against one catalog snapshot"""
+    crns = [crn for crn in request.args.get('crns', '').split(',') if crn.strip()]
+    subject = request.args.get('subject', '').strip().upper()
+    course_number = request.args.get('course_number', '').strip().upper()
+    if not crns and not (subject and course_number):
+        return jsonify({'error': 'Pass crns or subject and course_number'}), 400
+    try:
+        catalog = get_catalog()
+        sections, missing = resolve_sections(catalog, crns, subject, course_number)
+        headers = {'Age': str(int(catalog.age)), 'X-Catalog-Version': str(catalog.version)}
+        return jsonify({
+            'catalog_version': catalog.version,
+            'catalog_age_seconds': round(catalog.age, 1),
+            'courses': {crn: dict(course) for crn, course in sections},
+            'not_found': missing
+        }), 200, headers
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stream')
+def stream_seats():
+    """Server-Sent Events: seat changes for ?crns=9002,9003 as each catalog snapshot is published"""
+    crns = {crn.strip() for crn in request.args.get('crns', '').split(',') if crn.strip()}
+    if not crns:
+        return jsonify({'error': 'Pass the CRNs to watch as ?crns='}), 400
+    client = broker.subscribe(crns)
+    if client is None:
+        # Every stream slot is taken (or the worker is shutting down); the page falls back to reloading
+        return jsonify({'error': 'Too many live connections; try again later'}), 503, {'Retry-After': '60'}
+    return Response(stream_with_context(broker.stream(client)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/courses/<crn>')
 def get_course_info(crn):
     """API endpoint to get course information"""
     try:
-        courses = scrapeCourses()
-        if crn in courses:
-            return jsonify(courses[crn])
+        catalog = get_catalog()
+        headers = {'Age': str(int(catalog.age)), 'X-Catalog-Version': str(catalog.version)}
+        course = catalog.get(crn)
+        if course:
+            return jsonify(dict(course, catalog_age_seconds=round(catalog.age, 1))), 200, headers
         else:
-            return jsonify({'error': 'CRN not found'}), 404
+            return jsonify({'error': 'CRN not found', 'catalog_age_seconds': round(catalog.age, 1)}), 404, headers
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search')
+def search_courses():
+    """Autocomplete: top matches for ?q= by CRN, course code or title words"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    if not query:
+        return jsonify({'query': query, 'results': []})
+    try:
+        get_catalog()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    results = [dict(course, crn=crn) for crn, course in search_index.search(query, limit)]
+    return jsonify({'query': query, 'version': search_index.version, 'results': results})
+
+def history_range():
+    """(since, until) epoch seconds from ?since=&until= or ?days= (default 30)"""
+    until = request.args.get('until', time.time(), type=float)
+    since = request.args.get('since', type=float)
+    if since is None:
+        since = until - request.args.get('days', 30, type=float) * 86400
+    return since, until
+
+@app.route('/api/history/<crn>')
+def get_seat_history(crn):
+    """Seat history of one CRN: runs of unchanged seat counts plus how often and how long it opened"""
+    since, until = history_range()
+    runs = monitor.history.runs(crn, since, until)
+    return jsonify({
+        'crn': crn,
+        'since': since,
+        'until': until,
+        'summary': seat_openings(runs, since, until),
+        'runs': [{'seats': seats, 'started_at': started_at, 'ended_at': ended_at}
+                 for seats, started_at, ended_at in runs]
+    })
+
+@app.route('/api/history/subject/<subject>')
+def get_subject_history(subject):
+    """Opening statistics for every section of a subject, most frequently opening first"""
+    since, until = history_range()
+    catalog = catalog_cache.snapshot
+    sections = []
+    for crn, runs in monitor.history.subject_runs(subject.upper(), since, until).items():
+        course = catalog.get(crn) if catalog else None
+        section = dict(seat_openings(runs, since, until), crn=crn)
+        if course is not None:
+            section.update(course_number=course['course_number'], title=course['title'],
+                           instructor=course['instructor'], available_seats=course['available_seats'])
+        sections.append(section)
+    sections.sort(key=lambda section: (-section['openings'], -section['open_seconds'], section['crn']))
+    return jsonify({'subject': subject.upper(), 'since': since, 'until': until, 'sections': sections})
+
+@app.route('/api/changes')
+def get_changes():
+    """Catalog change feed: every change published after ?since=<version>"""
+    since = request.args.get('since', 0, type=int)
+    changes, complete = catalog_cache.changes.since(since)
+    return jsonify({
+        'version': catalog_cache.changes.latest_version,
+        'since': since,
+        'complete': complete,
+        'changes': changes
+    })
+
 @app.route('/remove/<crn>/<email>')
 def remove_request(crn, email):
     """Remove a monitoring request"""
-    global user_requests
-    user_requests = [req for req in user_requests if not (req['crn'] == crn and req['email'] == email)]
-    save_user_requests()
-    
-    # If no more requests for this CRN, stop monitoring
-    crn_requests = [req for req in user_requests if req['crn'] == crn]
-    if not crn_requests and crn in active_monitors:
-        del active_monitors[crn]
+    user_requests.remove(crn, email)
     
     return redirect(url_for('status'))
 
 def start_existing_monitors():
-    """Restart monitoring for existing requests when the app starts"""
-    load_user_requests()
-    crn_groups = {}
-    
-    # Group requests by CRN
-    for request in user_requests:
-        crn = request['crn']
-        if crn not in crn_groups:
-            crn_groups[crn] = []
-        crn_groups[crn].append(request)
-    
-    # Start monitoring threads for each unique CRN
-    for crn, requests in crn_groups.items():
-        if crn not in active_monitors:
-            # Use the first request's data for monitoring (all users with same CRN will be notified)
-            monitor_thread = threading.Thread(target=check_course_availability, args=(crn, requests[0]), daemon=True)
-            active_monitors[crn] = monitor_thread
-            monitor_thread.start()
+    """Compete for the leader lease; the winner starts the notifier and catalog poller"""
+    monitor.start()
 
 # Add a health check endpoint for Railway
 @app.route('/health')
 def health_check():
     """Health check endpoint for Railway"""
+    leader = monitor.leader()
     return jsonify({
         'status': 'healthy',
-        'active_monitors': len(active_monitors),
-        'total_requests': len(user_requests)
+        'active_monitors': len(watched_crns()),
+        'total_requests': len(user_requests),
+        'watch_rules': len(monitor.rules),
+        'poller_running': leader is not None,
+        'poller': {
+            'leader': leader[0] if leader else None,
+            'lease_expires_in': round(leader[1], 1) if leader else None,
+            'this_process': monitor.leading
+        },
+        'poll_schedule': monitor.poll_schedule(),
+        'registrar': get_registrar_guard().status(),
+        'notifications': dict(monitor.fanout.latency_summary(), pending=monitor.fanout.pending(),
+                              outbox_depth=notifier.outbox.depth())
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text-format metrics for scraping and notifications, from every live process"""
+    return Response(metrics.render_processes(monitor.published_metrics()), mimetype=None,
+                    content_type=metrics.CONTENT_TYPE)
+
 # Add error handlers for production
 @app.errorhandler(500)
 def handle_500(e):
@@ -238,17 +515,19 @@ def handle_404(e):
 # Add this route temporarily to your app.py for debugging
 @app.route('/debug')
 def debug():
-    """Debug route to test Selenium on Railway"""
+    """Debug route to inspect the cached catalog on Railway"""
     try:
-        from scraper import scrapeCourses
-        courses = scrapeCourses()
+        catalog = catalog_cache.get()
+        courses = catalog.courses if catalog else {}
         
         if courses:
-            sample = dict(list(courses.items())[:3])  # First 3 courses
+            sample = {crn: dict(info) for crn, info in list(courses.items())[:3]}  # First 3 courses
             return jsonify({
                 'status': 'success',
                 'total_courses': len(courses),
                 'sample_courses': sample,
+                'catalog_version': catalog.version,
+                'catalog_age_seconds': round(catalog.age, 1),
                 'environment': os.environ.get('RAILWAY_ENVIRONMENT', 'Unknown')
             })
         else:
@@ -267,6 +546,8 @@ def debug():
         })
 
 if __name__ == '__main__':
+    # Turn SIGTERM into SystemExit so the monitor shuts down cleanly below
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     try:
         # Load existing requests and start monitoring
         start_existing_monitors()
@@ -282,4 +563,7 @@ if __name__ == '__main__':
     except Exception as e:
         logger.error(f"Failed to start app: {str(e)}")
         raise
+    finally:
+        broker.close()
+        monitor.shutdown(timeout=Config.SHUTDOWN_TIMEOUT)
 
@@ -0,0 +1,11 @@
+import random
+
+
+def backoff_delay(attempt, base=2.0, cap=30.0):
+    """Jittered exponential backoff delay in seconds for a 0-based retry attempt.
+
+    Half of the exponential delay is fixed and half is random, so retries from
+    many callers spread out without ever retrying immediately.
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
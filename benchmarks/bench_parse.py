@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark course table parsing on the recorded fixture page.
+
+Compares the single-pass page_source parser with the legacy per-cell
+WebDriver parser. The WebDriver comparison needs a local Chrome; without
+one only the page_source parser is timed.
+
+Usage: python benchmarks/bench_parse.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from course_parser import parse_course_table
+from fixtures import RECORDED_FIXTURE, load_recorded_fixture
+
+
+def time_call(func, repeat):
+    """Best and mean wall time of `repeat` calls, plus the last result"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), sum(timings) / len(timings), result
+
+
+def bench_page_source(html, repeat):
+    best, mean, courses = time_call(lambda: parse_course_table(html), repeat)
+    print(f"page_source parser: {len(courses)} courses, best {best * 1000:.1f} ms, mean {mean * 1000:.1f} ms")
+    return courses
+
+
+def bench_webdriver(repeat):
+    try:
+        from driver import setupDriver
+        from scraper import scrapeTableElements
+        driver = setupDriver()
+    except Exception as e:
+        print(f"⚠️ Skipping WebDriver comparison: {str(e)}")
+        return None
+
+    try:
+        driver.get("file://" + RECORDED_FIXTURE)
+        best, mean, legacy = time_call(lambda: scrapeTableElements(driver), repeat)
+        print(f"WebDriver parser:   {len(legacy)} courses, best {best * 1000:.1f} ms, mean {mean * 1000:.1f} ms")
+
+        best, mean, fresh = time_call(lambda: parse_course_table(driver.page_source), repeat)
+        print(f"page_source + parse: {len(fresh)} courses, best {best * 1000:.1f} ms, mean {mean * 1000:.1f} ms")
+
+        if legacy != fresh:
+            differing = [crn for crn in legacy if legacy.get(crn) != fresh.get(crn)]
+            print(f"❌ Parsers disagree on {len(differing)} CRNs, e.g. {differing[:5]}")
+        else:
+            print("✅ Both parsers produced identical course data")
+        return legacy
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per parser")
+    args = parser.parse_args()
+
+    html = load_recorded_fixture()
+    print(f"📄 Fixture: {RECORDED_FIXTURE} ({len(html) / 1024:.0f} KB)")
+    bench_page_source(html, args.repeat)
+    # The legacy parser makes thousands of WebDriver round trips per run
+    bench_webdriver(min(args.repeat, 2))
+
+
+if __name__ == "__main__":
+    main()
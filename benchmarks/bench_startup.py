@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark web process cold start.
+
+Measures, each in a fresh interpreter:
+  - import time of `app` (wall time and the slowest modules from -X importtime)
+  - time from process start to the first 200 from / and /health, served by
+    werkzeug the way a web worker would
+It also fails if importing `app` pulls in the scraping stack (selenium,
+webdriver_manager, requests), which must only load on the first scrape.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--output PATH] [--compare PATH]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Modules that belong to the scraper and must stay out of a cold web process
+SCRAPING_STACK = ("selenium", "webdriver_manager", "requests", "driver", "http_fetcher", "scraper")
+
+IMPORT_SCRIPT = """
+import sys, time, json
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (SCRAPING_STACK,)
+
+SERVE_SCRIPT = """
+import sys
+from werkzeug.serving import make_server
+import app
+make_server("127.0.0.1", int(sys.argv[1]), app.app, threaded=True).serve_forever()
+"""
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def child_env(tmp):
+    # A scratch database, and no monitor: startup must not depend on a scrape
+    return dict(os.environ, DATABASE_PATH=os.path.join(tmp, "startup.db"), EMBEDDED_MONITOR="0")
+
+
+def bench_import(tmp):
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, env=child_env(tmp), text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(tmp, count=8):
+    """Modules imported directly by app, by cumulative import time from -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT,
+                            env=child_env(tmp), capture_output=True, text=True)
+    children, modules = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Nesting is shown by two spaces per level, and children are listed before their parent
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == "app":
+                modules = children
+            children = []
+    return [{"module": name, "ms": round(us / 1000, 1)} for us, name in sorted(modules, reverse=True)[:count]]
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.005)
+    return False
+
+
+def bench_first_response(tmp, timeout=60):
+    """Seconds from spawning a web process until / and then /health answer 200"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", SERVE_SCRIPT, str(port)], cwd=ROOT, env=child_env(tmp),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        if not wait_for(f"http://127.0.0.1:{port}/", deadline):
+            raise RuntimeError("web process did not answer / in time")
+        index_seconds = time.perf_counter() - started
+        if not wait_for(f"http://127.0.0.1:{port}/health", deadline):
+            raise RuntimeError("web process did not answer /health in time")
+        return index_seconds, time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts to measure (median is reported)")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>-startup.json)")
+    parser.add_argument("--compare", help="earlier startup results file to compare against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    with tempfile.TemporaryDirectory() as tmp:
+        imports = [bench_import(tmp) for _ in range(args.repeat)]
+        responses = [bench_first_response(tmp) for _ in range(args.repeat)]
+        slowest = slowest_imports(tmp)
+
+    loaded = sorted({module for run in imports for module in run["loaded"]})
+    results = {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_seconds": round(median([run["seconds"] for run in imports]), 4),
+        "first_index_seconds": round(median([index for index, _ in responses]), 4),
+        "first_health_seconds": round(median([health for _, health in responses]), 4),
+        "scraping_modules_loaded": loaded,
+        "slowest_imports": slowest,
+    }
+
+    print(f"⏱️ import app: {results['import_seconds'] * 1000:.0f} ms (median of {args.repeat})")
+    print(f"⏱️ first 200 from /: {results['first_index_seconds'] * 1000:.0f} ms, "
+          f"/health: {results['first_health_seconds'] * 1000:.0f} ms")
+    for entry in slowest:
+        print(f"   {entry['module']:<28} {entry['ms']:>7} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-startup.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"\n📊 Compared with {previous.get('commit')} ({args.compare}):")
+        for key in ("import_seconds", "first_index_seconds", "first_health_seconds"):
+            print(f"   {key}: {previous.get(key)} -> {results[key]}")
+
+    if loaded:
+        print(f"❌ Importing app loaded the scraping stack: {', '.join(loaded)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
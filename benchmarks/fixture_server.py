@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for courseSchedule.aspx that serves recorded HTML.
+
+GET returns the fixture page for the first term; a POST that changes the
+term select (an ASP.NET postback) returns the page with that term selected.
+With --etag, GET sends an ETag and answers a matching If-None-Match with 304.
+Point the scraper at it with:
+
+    SCRAPER_URL=http://127.0.0.1:8765/myWofford/registrar/courseSchedule.aspx
+
+Usage: python benchmarks/fixture_server.py [--port 8765] [--fixture PATH] [--terms 202610,202620] [--etag]
+"""
+
+import argparse
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from fixtures import RECORDED_FIXTURE
+
+CATALOG_PATH = "/myWofford/registrar/courseSchedule.aspx"
+TERM_FIELD = "ctl00$ContentPlaceHolder1$ddlTerm"
+_SELECT_RE = re.compile(r'<select name="ctl00\$ContentPlaceHolder1\$ddlTerm".*?</select>', re.S)
+
+
+def make_handler(html, terms, etag=False):
+    def render(term):
+        selected = ' selected="selected"'
+        options = "".join(f'<option{selected if t == term else ""} value="{t}">{t}</option>' for t in terms)
+        return _SELECT_RE.sub(lambda m: f'<select name="{TERM_FIELD}" id="ddlTerm">{options}</select>', html)
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real IIS server
+
+        def do_GET(self):
+            if self.path.split("?")[0] != CATALOG_PATH:
+                return self._send(404, "Not Found")
+            body = render(terms[0])
+            if not etag:
+                return self._send(200, body)
+            tag = '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()
+            if self.headers.get("If-None-Match") == tag:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.end_headers()
+                return
+            self._send(200, body, {"ETag": tag})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            form = parse_qs(self.rfile.read(length).decode())
+            if "__VIEWSTATE" not in form:
+                return self._send(400, "Missing __VIEWSTATE")
+            term = form.get(TERM_FIELD, [terms[0]])[0]
+            if term not in terms:
+                return self._send(400, f"Unknown term {term}")
+            self._send(200, render(term))
+
+        def _send(self, status, body, headers=None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_server(port=0, fixture=RECORDED_FIXTURE, terms=("202610", "202620"), etag=False):
+    """Serve the fixture in a background thread. Returns (server, catalog_url)."""
+    with open(fixture, encoding="utf-8") as f:
+        html = f.read()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(html, list(terms), etag))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{CATALOG_PATH}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture", default=RECORDED_FIXTURE)
+    parser.add_argument("--terms", default="202610,202620")
+    parser.add_argument("--etag", action="store_true", help="send ETags and answer conditional GETs with 304")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.fixture, args.terms.split(","), args.etag)
+    print(f"📡 Serving {args.fixture} at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Build courseSchedule.aspx fixture pages for offline benchmarks.
+
+The recorded fixture is generated from the CRN list in available_crns.txt
+with deterministic filler values for the columns that list does not carry.
+Synthetic catalogs of any size come from synthetic_courses(). Run this script to regenerate benchmarks/fixtures/courseSchedule.html.
+"""
+
+import os
+import random
+from html import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RECORDED_FIXTURE = os.path.join(FIXTURE_DIR, "courseSchedule.html")
+CRN_LIST = os.path.join(ROOT, "available_crns.txt")
+
+HEADERS = ["CRN", "Subj", "Crse", "Sec", "Cmp", "Cred", "Ptrm", "Attr", "Lvl", "Type",
+           "Title", "Start", "End", "Days", "Time", "Bldg", "Room", "Cap", "Act", "Rem",
+           "Instructor", "Notes"]
+
+DAYS = ["MWF", "TR", "MW", "M", "T", "W", "R", "F", "TBA"]
+TIMES = ["08:00 am-08:50 am", "09:00 am-09:50 am", "10:00 am-10:50 am", "11:00 am-11:50 am",
+         "01:00 pm-02:15 pm", "02:30 pm-03:45 pm", "08:30 am-09:45 am", "10:00 am-11:15 am"]
+BUILDINGS = ["OLIN", "MAIN", "ROGER", "CHAP", "RICH"]
+INSTRUCTORS = ["Smith, J", "Johnson, A", "Williams, R", "Brown, K", "Jones, M", "Garcia, L",
+               "Miller, D", "Davis, S", "Rodriguez, P", "Martinez, C", "Hernandez, T", "Lopez, E"]
+SUBJECTS = ["ACC", "ARBC", "ARTH", "BIO", "BUS", "CHEM", "CHIN", "COSC", "ECO", "ENGL", "ENVS", "FIN",
+            "FREN", "GEOL", "GER", "GOV", "HIST", "HUM", "MATH", "MUS", "PHIL", "PHY", "PSY", "REL",
+            "SOC", "SPAN", "THEA"]
+TITLE_WORDS = ["Introduction", "Principles", "Advanced", "Topics", "Seminar", "Methods", "Theory", "History",
+               "Analysis", "Modern", "Applied", "Foundations", "Literature", "Research", "Design", "Systems"]
+
+
+def load_crn_list(path=CRN_LIST):
+    """Read (crn, subject, course_number, title) tuples from available_crns.txt"""
+    courses = []
+    with open(path) as f:
+        for line in f:
+            head, sep, title = line.strip().partition(" - ")
+            crn, colon, course = head.partition(": ")
+            if not sep or not colon or not crn.isdigit():
+                continue
+            subject, _, course_number = course.partition(" ")
+            courses.append((crn, subject, course_number, title))
+    return courses
+
+
+def build_rows(courses, seed=42):
+    """Expand (crn, subject, course_number, title) tuples into full table rows"""
+    rng = random.Random(seed)
+    rows = []
+    for index, (crn, subject, course_number, title) in enumerate(courses):
+        capacity = rng.choice([15, 20, 25, 30, 35])
+        enrolled = rng.randint(capacity - 5, capacity)
+        rows.append([
+            crn, subject, course_number, f"{index % 9 + 1:02d}", "1", "4.000", "1", "", "UG", "LEC",
+            title, "09/02", "12/12", rng.choice(DAYS), rng.choice(TIMES),
+            rng.choice(BUILDINGS), str(rng.randint(100, 350)), str(capacity), str(enrolled),
+            str(capacity - enrolled), rng.choice(INSTRUCTORS), "",
+        ])
+    return rows
+
+
+def synthetic_courses(count, seed=7):
+    """(crn, subject, course_number, title) tuples for a synthetic catalog of `count` sections"""
+    rng = random.Random(seed)
+    courses = []
+    for index in range(count):
+        title = " ".join(rng.sample(TITLE_WORDS, 3))
+        courses.append((str(10000 + index), rng.choice(SUBJECTS), str(rng.randint(100, 499)), title))
+    return courses
+
+
+def render_schedule_html(rows, term="202610"):
+    """Render rows as a courseSchedule.aspx-like page (ASP.NET form, nav table, results table)"""
+    parts = [
+        "<!DOCTYPE html>\n<html><head><title>Course Schedule</title>",
+        "<script>var theForm = document.forms['form1'];</script></head>\n<body>",
+        '<form method="post" action="./courseSchedule.aspx" id="form1">',
+        '<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="dDwtMTA4MTM2NTk2Mzs7Pg==" />',
+        '<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="C2EE9ABB" />',
+        '<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="wEWAgKd8pTbBgK3" />',
+        '<table class="nav"><tr><td><a href="/">myWofford</a></td><td>Registrar</td></tr></table>',
+        '<select name="ctl00$ContentPlaceHolder1$ddlTerm" id="ddlTerm">',
+        f'<option selected="selected" value="{term}">Fall {term[:4]}</option>',
+        "</select>",
+        '<table id="gvCourses" class="grid">',
+        "<tr>" + "".join(f"<th>{escape(h)}</th>" for h in HEADERS) + "</tr>",
+    ]
+    for row in rows:
+        parts.append("<tr>" + "".join(f"<td>{escape(cell) if cell else '&nbsp;'}</td>" for cell in row) + "</tr>")
+    parts.append("</table>\n</form>\n</body></html>\n")
+    return "\n".join(parts)
+
+
+def load_recorded_fixture():
+    with open(RECORDED_FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    rows = build_rows(load_crn_list())
+    with open(RECORDED_FIXTURE, "w", encoding="utf-8") as f:
+        f.write(render_schedule_html(rows))
+    print(f"💾 Wrote {len(rows)} sections to {RECORDED_FIXTURE}")
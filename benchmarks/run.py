@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the scraping, diffing and matching pipeline.
+
+Runs against the recorded fixture page and synthetic catalogs (10k and 100k
+sections by default) and measures:
+  - parse throughput and peak memory of parse_course_table
+  - snapshot diff time between two consecutive catalogs
+  - subscription matching time as the number of subscribers grows
+
+Results are written to benchmarks/results/<commit>.json; pass --compare with
+an earlier results file to print the change for every measurement.
+
+Usage: python benchmarks/run.py [--sizes recorded,10000,100000] [--subscribers 100,1000,10000]
+                                [--output PATH] [--compare PATH]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import CatalogCache, diff_catalogs
+from course_parser import parse_course_table
+from fixtures import build_rows, load_recorded_fixture, render_schedule_html, synthetic_courses
+from poller import CatalogPoller
+from store import SubscriptionStore
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_fixture(size):
+    if size == "recorded":
+        return load_recorded_fixture()
+    return render_schedule_html(build_rows(synthetic_courses(int(size))))
+
+
+def churn(courses, fraction, seed=1):
+    """Copy of `courses` with a fraction of seat counts changed"""
+    rng = random.Random(seed)
+    changed = {crn: dict(course) for crn, course in courses.items()}
+    for crn in rng.sample(sorted(changed), max(1, int(len(changed) * fraction))):
+        changed[crn]['available_seats'] = rng.choice([0, 1, 2, 5])
+    return changed
+
+
+def bench_parse(html):
+    started = time.perf_counter()
+    courses = parse_course_table(html)
+    elapsed = time.perf_counter() - started
+
+    # Measure memory separately; tracemalloc slows the parse down
+    tracemalloc.start()
+    parse_course_table(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return courses, {
+        "html_bytes": len(html),
+        "rows": len(courses),
+        "parse_seconds": round(elapsed, 4),
+        "rows_per_second": round(len(courses) / elapsed) if elapsed else None,
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def bench_diff(courses, fraction=0.02):
+    updated = churn(courses, fraction)
+    started = time.perf_counter()
+    changes = diff_catalogs(courses, updated)
+    return {
+        "churn_fraction": fraction,
+        "changes": len(changes),
+        "diff_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+class _CountingFanout:
+    def __init__(self):
+        self.dispatched = 0
+
+    def dispatch(self, crn, course_info, subscribers, detected_at=None):
+        self.dispatched += len(subscribers)
+        return len(subscribers)
+
+
+def bench_matching(courses, subscriber_counts, fraction=0.02):
+    """Time a full matching pass and a diff-driven pass for each subscriber count"""
+    results = []
+    crns = sorted(courses)
+    updated = churn(courses, fraction)
+    for count in subscriber_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SubscriptionStore(os.path.join(tmp, "bench.db"))
+            rng = random.Random(count)
+            for i in range(count):
+                store.add({'name': 'Bench', 'email': f'user{i}@example.com', 'crn': rng.choice(crns)})
+
+            catalogs = iter([courses, updated])
+            cache = CatalogCache(lambda: next(catalogs))
+            fanout = _CountingFanout()
+            poller = CatalogPoller(cache, store, fanout)
+
+            # The first pass checks every watched CRN; the second only the changed ones
+            full_snapshot = cache.refresh()
+            started = time.perf_counter()
+            poller.match(full_snapshot)
+            full_seconds = time.perf_counter() - started
+
+            diff_snapshot = cache.refresh()
+            started = time.perf_counter()
+            poller.match(diff_snapshot)
+            diff_seconds = time.perf_counter() - started
+
+            results.append({
+                "subscribers": count,
+                "full_match_seconds": round(full_seconds, 4),
+                "diff_match_seconds": round(diff_seconds, 4),
+                "notifications": fanout.dispatched,
+            })
+            store.close()
+    return results
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\n📊 Compared with {previous.get('commit')} ({previous_path}):")
+    for size, result in current["catalogs"].items():
+        before = previous.get("catalogs", {}).get(size)
+        if not before:
+            continue
+        for key in ("parse_seconds", "peak_memory_mb"):
+            print(f"   {size:>9} {key}: {before['parse'][key]} -> {result['parse'][key]}")
+        print(f"   {size:>9} diff_seconds: {before['diff']['diff_seconds']} -> {result['diff']['diff_seconds']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="recorded,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--subscribers", default="100,1000,10000", help="comma-separated subscriber counts")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    subscriber_counts = [int(count) for count in args.subscribers.split(",") if count]
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "catalogs": {},
+    }
+
+    for size in [size.strip() for size in args.sizes.split(",") if size.strip()]:
+        print(f"🔍 Catalog {size}...")
+        html = load_fixture(size)
+        courses, parse_result = bench_parse(html)
+        del html
+        print(f"   parse: {parse_result['rows']} rows in {parse_result['parse_seconds']}s, "
+              f"{parse_result['rows_per_second']} rows/s, peak {parse_result['peak_memory_mb']} MB")
+
+        diff_result = bench_diff(courses)
+        print(f"   diff: {diff_result['changes']} changes in {diff_result['diff_seconds']}s")
+
+        match_results = bench_matching(courses, subscriber_counts)
+        for match in match_results:
+            print(f"   match: {match['subscribers']} subscribers, full {match['full_match_seconds']}s, "
+                  f"diff {match['diff_match_seconds']}s")
+
+        results["catalogs"][size] = {"parse": parse_result, "diff": diff_result, "matching": match_results}
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import sys
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+
+from metrics import CACHE_REQUESTS_TOTAL
+
+# Course fields whose changes are reported besides seat counts
+DETAIL_FIELDS = ('subject', 'course_number', 'title', 'days', 'time', 'instructor')
+
+
+class Course:
+    """One catalog section as a compact, immutable record.
+
+    Reads like the dict it replaces (`course['title']`, `course.get(...)`,
+    `dict(course)`), but has no per-instance dict, and its repeated strings
+    (subjects, days, times, instructors) are interned so every section and
+    snapshot shares one copy of each.
+    """
+
+    FIELDS = ('subject', 'course_number', 'title', 'days', 'time', 'instructor', 'available_seats')
+    __slots__ = FIELDS
+
+    def __init__(self, subject, course_number, title, days, time, instructor, available_seats):
+        setattr_ = object.__setattr__
+        setattr_(self, 'subject', sys.intern(subject))
+        setattr_(self, 'course_number', sys.intern(course_number))
+        setattr_(self, 'title', sys.intern(title))
+        setattr_(self, 'days', sys.intern(days))
+        setattr_(self, 'time', sys.intern(time))
+        setattr_(self, 'instructor', sys.intern(instructor))
+        setattr_(self, 'available_seats', available_seats)
+
+    @classmethod
+    def from_mapping(cls, info):
+        if isinstance(info, cls):
+            return info
+        return cls(*(info[field] for field in cls.FIELDS))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Course records are read-only")
+
+    def __getitem__(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Course):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, field) for field in self.FIELDS))
+
+    def __repr__(self):
+        return f"Course({self.subject} {self.course_number}, {self.available_seats} seats)"
+
+
+class CatalogSnapshot:
+    """Read-only view of one catalog scrape, shared by every reader"""
+
+    __slots__ = ('_courses', '_version', '_fetched_at')
+
+    def __init__(self, courses, version, fetched_at=None, previous=None):
+        # Sections that did not change since `previous` reuse its Course records,
+        # so keeping many snapshots costs little more than keeping one
+        reuse = previous.courses if previous is not None else {}
+        compact = {}
+        for crn, info in courses.items():
+            course = Course.from_mapping(info)
+            before = reuse.get(crn)
+            compact[sys.intern(crn)] = before if before == course else course
+        self._courses = MappingProxyType(compact)
+        self._version = version
+        self._fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @property
+    def courses(self):
+        return self._courses
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def fetched_at(self):
+        return self._fetched_at
+
+    @property
+    def age(self):
+        """Seconds since this snapshot was scraped"""
+        return max(0.0, time.time() - self._fetched_at)
+
+    def get(self, crn):
+        return self._courses.get(crn)
+
+    def refreshed(self, fetched_at=None):
+        """Same courses and version, confirmed current at `fetched_at` (without copying the courses)"""
+        snapshot = CatalogSnapshot.__new__(CatalogSnapshot)
+        snapshot._courses = self._courses
+        snapshot._version = self._version
+        snapshot._fetched_at = fetched_at if fetched_at is not None else time.time()
+        return snapshot
+
+    def __contains__(self, crn):
+        return crn in self._courses
+
+    def __len__(self):
+        return len(self._courses)
+
+    def __repr__(self):
+        return f"CatalogSnapshot(version={self._version}, courses={len(self._courses)})"
+
+
+def diff_catalogs(old, new):
+    """Compact change set between two course mappings keyed by CRN.
+
+    Each change is a dict with the CRN, a `kind` (seats_opened, seats_closed,
+    seats_changed, section_added, section_removed or details_changed) and the
+    values that changed.
+    """
+    changes = []
+    for crn, course in new.items():
+        before = old.get(crn)
+        if before is course:
+            # Shared record between snapshots: nothing changed
+            continue
+        if before is None:
+            changes.append({'crn': crn, 'kind': 'section_added', 'available_seats': course['available_seats']})
+            continue
+
+        seats_before, seats_after = before['available_seats'], course['available_seats']
+        if seats_before != seats_after:
+            if seats_before <= 0 < seats_after:
+                kind = 'seats_opened'
+            elif seats_after <= 0 < seats_before:
+                kind = 'seats_closed'
+            else:
+                kind = 'seats_changed'
+            changes.append({'crn': crn, 'kind': kind, 'before': seats_before, 'available_seats': seats_after})
+
+        fields = {field: [before[field], course[field]] for field in DETAIL_FIELDS if before[field] != course[field]}
+        if fields:
+            changes.append({'crn': crn, 'kind': 'details_changed', 'fields': fields})
+
+    for crn in old:
+        if crn not in new:
+            changes.append({'crn': crn, 'kind': 'section_removed'})
+    return changes
+
+
+class ChangeFeed:
+    """Bounded history of per-version change sets"""
+
+    def __init__(self, maxlen=100):
+        self._entries = deque(maxlen=maxlen)  # (version, fetched_at, changes)
+        self._lock = threading.Lock()
+
+    def append(self, version, fetched_at, changes):
+        with self._lock:
+            self._entries.append((version, fetched_at, changes))
+
+    def since(self, version):
+        """Changes published after `version`.
+
+        Returns (changes, complete); `complete` is False when versions after
+        `version` have already been dropped from the history, in which case
+        the caller cannot rely on the changes alone.
+        """
+        with self._lock:
+            entries = list(self._entries)
+        complete = not entries or entries[0][0] <= version + 1
+        changes = []
+        for entry_version, fetched_at, entry_changes in entries:
+            if entry_version > version:
+                changes.extend(dict(change, version=entry_version, fetched_at=fetched_at) for change in entry_changes)
+        return changes, complete
+
+    @property
+    def latest_version(self):
+        with self._lock:
+            return self._entries[-1][0] if self._entries else 0
+
+
+class CatalogCache:
+    """Process-wide catalog cache with a TTL, stale-while-revalidate and single-flight refresh.
+
+    Readers get the cached snapshot immediately while it is younger than `ttl`.
+    Once it expires they still get the stale copy (up to `max_stale` seconds past
+    the TTL) while one background refresh runs. Concurrent refreshes share a
+    single in-flight scrape instead of each launching their own.
+
+    While a poller keeps the catalog fresh it sets `poll_interval`, and
+    snapshots then stay fresh until one TTL past the next scheduled poll, so
+    reads never scrape more often than the poll schedule allows.
+    """
+
+    def __init__(self, scrape, ttl=300, max_stale=3600):
+        self._scrape = scrape
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.poll_interval = None  # Seconds between the running poller's scrapes, if one is running
+
+        # Changes between consecutive snapshots; the snapshots themselves live in the SnapshotStore
+        self.changes = ChangeFeed()
+
+        self._snapshot = None
+        self._version = 0
+        self._scraped = None  # Course dict behind the current snapshot, to spot unchanged scrapes
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._inflight = None  # Event set when the running refresh finishes
+
+    @property
+    def snapshot(self):
+        """Cached snapshot without triggering a refresh (may be None)"""
+        return self._snapshot
+
+    def add_listener(self, callback):
+        """Call `callback(snapshot, changes)` after every newly published version"""
+        self._listeners.append(callback)
+
+    def get(self):
+        """Return a usable snapshot, scraping only when nothing usable is cached"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            CACHE_REQUESTS_TOTAL.inc(result='miss')
+            return self.refresh()
+
+        age = snapshot.age
+        poll_interval = self.poll_interval
+        ttl = self.ttl if poll_interval is None else poll_interval + self.ttl
+        if age <= ttl:
+            CACHE_REQUESTS_TOTAL.inc(result='hit')
+            return snapshot
+        if age <= ttl + self.max_stale:
+            # Serve stale data now and revalidate in the background
+            CACHE_REQUESTS_TOTAL.inc(result='stale')
+            self.refresh(wait=False)
+            return snapshot
+        CACHE_REQUESTS_TOTAL.inc(result='miss')
+        return self.refresh()
+
+    def refresh(self, wait=True, max_age=None):
+        """Scrape a new snapshot, joining any refresh that is already in flight.
+
+        With `max_age`, a cached snapshot at most that old is returned as is.
+        With `wait=False` the refresh runs in a background thread and the
+        current snapshot is returned straight away.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if max_age is not None and snapshot is not None and snapshot.age <= max_age:
+                return snapshot
+
+            inflight = self._inflight
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight = threading.Event()
+
+        if leader:
+            if wait:
+                self._do_refresh(inflight)
+            else:
+                threading.Thread(target=self._do_refresh, args=(inflight,),
+                                 name="catalog-refresh", daemon=True).start()
+                return snapshot
+        elif not wait:
+            return snapshot
+        else:
+            inflight.wait()
+
+        return self._snapshot
+
+    def _do_refresh(self, inflight):
+        try:
+            courses = self._scrape()
+            if isinstance(courses, CatalogSnapshot):
+                self.publish(courses)
+            elif courses is not None and courses is self._scraped and self._snapshot is not None:
+                # The scraper handed back the same dict: the page did not change
+                self.publish(self._snapshot.refreshed())
+            elif courses:
+                self.publish(courses)
+                self._scraped = courses
+            else:
+                print("Catalog refresh returned no courses. Keeping cached snapshot.")
+        except Exception as e:
+            print(f"Catalog refresh failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+
+    def publish(self, courses, fetched_at=None):
+        """Wrap freshly scraped courses in a new snapshot, diff it against the last one and make it current.
+
+        `courses` may also be a snapshot that was already versioned elsewhere
+        (e.g. loaded from the shared SnapshotStore). It keeps its version, and
+        is ignored if it is not newer than the current snapshot. A snapshot
+        with the current version but a later fetch time only renews the
+        current one: nothing is diffed and no change is published.
+        """
+        with self._lock:
+            previous = self._snapshot
+            if isinstance(courses, CatalogSnapshot):
+                snapshot = courses
+                if previous is not None and snapshot.version == previous.version:
+                    if snapshot.fetched_at > previous.fetched_at:
+                        self._snapshot = snapshot
+                    return self._snapshot
+                if snapshot.version <= self._version:
+                    return previous
+                self._version = snapshot.version
+            else:
+                self._version += 1
+                snapshot = CatalogSnapshot(courses, self._version, fetched_at, previous=previous)
+            changes = diff_catalogs(previous.courses, snapshot.courses) if previous else []
+            self.changes.append(snapshot.version, snapshot.fetched_at, changes)
+            self._snapshot = snapshot
+        print(f"Published catalog snapshot v{snapshot.version} with {len(snapshot)} courses, {len(changes)} change(s)")
+        for callback in self._listeners:
+            try:
+                callback(snapshot, changes)
+            except Exception as e:
+                print(f"Catalog listener failed: {str(e)}")
+        return snapshot
@@ -0,0 +1,35 @@
+import os
+
+# Production configuration, shared by the web app and the monitor worker
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+    DEBUG = os.environ.get('FLASK_ENV') == 'development'
+    PORT = int(os.environ.get('PORT', 5000))
+    POLL_INTERVAL = int(os.environ.get('POLL_INTERVAL', 300))
+    POLL_MIN_INTERVAL = int(os.environ.get('POLL_MIN_INTERVAL', 60))
+    POLL_MAX_INTERVAL = int(os.environ.get('POLL_MAX_INTERVAL', 1800))
+    REGISTRATION_WINDOWS = os.environ.get('REGISTRATION_WINDOWS', '')  # "start/end,..." ISO datetimes
+    REGISTRAR_MAX_REQUESTS_PER_HOUR = int(os.environ.get('REGISTRAR_MAX_REQUESTS_PER_HOUR', 120))
+    # Requests to the registrar that may go out back to back (retries, term postbacks)
+    REGISTRAR_BURST = int(os.environ.get('REGISTRAR_BURST', 5))
+    # Consecutive failed requests that open the circuit breaker, and how long it stays open
+    REGISTRAR_BREAKER_FAILURES = int(os.environ.get('REGISTRAR_BREAKER_FAILURES', 3))
+    REGISTRAR_BREAKER_COOLDOWN = int(os.environ.get('REGISTRAR_BREAKER_COOLDOWN', 60))
+    REGISTRAR_BREAKER_MAX_COOLDOWN = int(os.environ.get('REGISTRAR_BREAKER_MAX_COOLDOWN', 900))
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+    CATALOG_MAX_STALE = int(os.environ.get('CATALOG_MAX_STALE', 3600))
+    NOTIFY_WORKERS = int(os.environ.get('NOTIFY_WORKERS', 8))
+    SMTP_WORKERS = int(os.environ.get('SMTP_WORKERS', 2))
+    # Days to keep sent and failed emails (recipients and bodies) in the outbox
+    OUTBOX_RETENTION_DAYS = float(os.environ.get('OUTBOX_RETENTION_DAYS', 7))
+    DATABASE_PATH = os.environ.get('DATABASE_PATH', 'openseat.db')
+    # Run the poller inside web processes (one of them wins the leader lease).
+    # Set to 0 when `python worker.py` runs the monitor beside the web server (same DATABASE_PATH).
+    EMBEDDED_MONITOR = os.environ.get('EMBEDDED_MONITOR', '1').lower() not in ('0', 'false', 'no')
+    # Open /api/stream connections per web worker; each holds a server thread, so keep it
+    # well below the worker's thread count (GUNICORN_THREADS) to leave room for other requests
+    MAX_EVENT_STREAMS = int(os.environ.get('MAX_EVENT_STREAMS', max(1, int(os.environ.get('GUNICORN_THREADS', 16)) // 2)))
+    LEADER_LEASE_TTL = int(os.environ.get('LEADER_LEASE_TTL', 60))
+    SNAPSHOT_HISTORY = int(os.environ.get('SNAPSHOT_HISTORY', 20))
+    # Seconds a stopping process may spend finishing scrapes and sending queued emails
+    SHUTDOWN_TIMEOUT = int(os.environ.get('SHUTDOWN_TIMEOUT', 30))
@@ -0,0 +1,194 @@
+import sys
+from html.parser import HTMLParser
+
+# Column positions in the courseSchedule.aspx results table
+CRN_COL = 0
+SUBJECT_COL = 1
+COURSE_NUMBER_COL = 2
+TITLE_COL = 10
+DAYS_COL = 13
+TIME_COL = 14
+SEATS_COL = 19
+INSTRUCTOR_COL = 20
+MIN_COLUMNS = 12
+
+# Tags whose text never shows up in a rendered cell
+_HIDDEN_TAGS = {'script', 'style', 'head', 'title'}
+
+
+def parse_course_row(details):
+    """Map one row of cell texts to (crn, course). Returns None for non-course rows."""
+    if not details or len(details) < MIN_COLUMNS:
+        return None
+
+    crn = details[CRN_COL].strip()
+
+    # Skip empty CRNs
+    if not crn or not crn.replace('-', '').replace(' ', ''):
+        return None
+
+    # Extract course information with safe indexing
+    subject = details[SUBJECT_COL] if len(details) > SUBJECT_COL else "N/A"
+    course_number = details[COURSE_NUMBER_COL] if len(details) > COURSE_NUMBER_COL else "N/A"
+    title = details[TITLE_COL] if len(details) > TITLE_COL else "N/A"
+    days = details[DAYS_COL] if len(details) > DAYS_COL else "N/A"
+    time_slot = details[TIME_COL] if len(details) > TIME_COL else "N/A"
+    instructor = details[INSTRUCTOR_COL] if len(details) > INSTRUCTOR_COL else "N/A"
+
+    # Handle available seats more carefully
+    available_seats = 0
+    if len(details) > SEATS_COL:
+        seats_text = details[SEATS_COL].strip()
+        if seats_text.isdigit():
+            available_seats = int(seats_text)
+
+    # Subjects, days, times and instructors repeat across hundreds of rows; keep one copy of each
+    return sys.intern(crn), {
+        "subject": sys.intern(subject),
+        "course_number": sys.intern(course_number),
+        "title": sys.intern(title),
+        "days": sys.intern(days),
+        "time": sys.intern(time_slot),
+        "instructor": sys.intern(instructor),
+        "available_seats": available_seats
+    }
+
+
+class _TableCollector(HTMLParser):
+    """Single-pass collector of every table's rows as lists of cell texts"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []      # Each table is a list of rows, each row a list of cell texts
+        self._stack = []      # Open tables, innermost last
+        self._row = None
+        self._cell = None
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth += 1
+        elif tag == 'table':
+            rows = []
+            self.tables.append(rows)
+            self._stack.append((rows, self._row, self._cell))
+            self._row = None
+            self._cell = None
+        elif not self._stack:
+            return
+        elif tag == 'tr':
+            self._finish_row()
+            self._row = []
+        elif tag == 'td':
+            self._finish_cell()
+            if self._row is None:
+                self._row = []
+            self._cell = []
+        elif tag == 'th':
+            # Header cells end any open data cell but are not collected
+            self._finish_cell()
+        elif tag == 'br' and self._cell is not None:
+            self._cell.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth = max(0, self._hidden_depth - 1)
+        elif tag == 'table' and self._stack:
+            self._finish_row()
+            _, self._row, self._cell = self._stack.pop()
+        elif tag == 'tr':
+            self._finish_row()
+        elif tag == 'td':
+            self._finish_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None and not self._hidden_depth:
+            self._cell.append(data)
+
+    def _finish_cell(self):
+        if self._cell is not None:
+            # Match WebElement.text: collapse whitespace, treat &nbsp; as a space
+            text = ' '.join(''.join(self._cell).replace('\xa0', ' ').split())
+            self._row.append(text)
+            self._cell = None
+
+    def _finish_row(self):
+        self._finish_cell()
+        if self._row is not None:
+            self._stack[-1][0].append(self._row)
+            self._row = None
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self.handle_endtag('table')
+
+
+def parse_table_rows(html):
+    """Rows of the largest table in the page, header row included"""
+    collector = _TableCollector()
+    collector.feed(html)
+    collector.close()
+
+    if not collector.tables:
+        raise ValueError("No course tables found on the page")
+
+    # The course table is the one with the most rows
+    return max(collector.tables, key=len)
+
+
+def parse_course_table(html):
+    """Parse the course schedule page HTML into a courseDict keyed by CRN"""
+    all_rows = parse_table_rows(html)
+    data_rows = all_rows[1:] if len(all_rows) > 1 else all_rows
+
+    if len(data_rows) == 0:
+        raise ValueError("No data rows found in course table")
+
+    courseDict = {}
+    for details in data_rows:
+        parsed = parse_course_row(details)
+        if parsed:
+            crn, course = parsed
+            courseDict[crn] = course
+
+    return courseDict
+
+
+class _FormCollector(HTMLParser):
+    """Collects hidden inputs and <select> options of an ASP.NET form"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields = {}
+        self.selects = {}
+        self._select = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'input' and attrs.get('name') and (attrs.get('type') or 'text').lower() == 'hidden':
+            self.fields[attrs['name']] = attrs.get('value') or ''
+        elif tag == 'select' and attrs.get('name'):
+            self._select = {'options': [], 'selected': None}
+            self.selects[attrs['name']] = self._select
+        elif tag == 'option' and self._select is not None:
+            value = attrs.get('value') or ''
+            self._select['options'].append(value)
+            if 'selected' in attrs or self._select['selected'] is None:
+                self._select['selected'] = value
+
+    def handle_endtag(self, tag):
+        if tag == 'select':
+            self._select = None
+
+
+def parse_form_fields(html):
+    """Hidden form fields (viewstate etc.) and select boxes needed for a postback.
+
+    Returns (fields, selects) where selects maps each select name to its
+    option values and currently selected value.
+    """
+    collector = _FormCollector()
+    collector.feed(html)
+    collector.close()
+    return collector.fields, collector.selects
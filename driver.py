@@ -1,5 +1,8 @@
 import os
+import queue
+import threading
 import time
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -8,6 +11,22 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from backoff import backoff_delay
+from metrics import BROWSER_STARTUP_SECONDS, PAGE_LOAD_SECONDS
+from registrar_guard import RegistrarUnavailable
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def resolve_chromedriver():
+    """Locate the chromedriver binary once per process"""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = os.environ.get('CHROMEDRIVER_PATH') or ChromeDriverManager().install()
+            print(f"🔧 Using chromedriver at {_chromedriver_path}")
+        return _chromedriver_path
+
 def setupDriver():
     """Set up Selenium WebDriver optimized for Railway"""
     options = Options()
@@ -47,8 +66,9 @@ def setupDriver():
     
     try:
         # Create the driver with increased timeouts
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        service = Service(resolve_chromedriver())
+        with BROWSER_STARTUP_SECONDS.time():
+            driver = webdriver.Chrome(service=service, options=options)
         
         # Set aggressive timeouts for Railway
         driver.set_page_load_timeout(90)  # Increased timeout
@@ -61,29 +81,251 @@ def setupDriver():
         print(f"❌ Error setting up Chrome driver: {str(e)}")
         raise e
 
-def safe_get_page(driver, url, retries=3):
-    """Safely load a page with retries"""
+# Rows in the largest table on the page; the course table is ready once it has data rows
+COURSE_TABLE_ROWS_JS = """
+var best = 0;
+var tables = document.getElementsByTagName('table');
+for (var i = 0; i < tables.length; i++) {
+    if (tables[i].rows.length > best) { best = tables[i].rows.length; }
+}
+return best;
+"""
+
+def course_table_ready(driver):
+    """True once the page has a table with a header row and at least one data row"""
+    try:
+        return (driver.execute_script(COURSE_TABLE_ROWS_JS) or 0) > 1
+    except Exception:
+        return False
+
+def observe_attempt(report):
+    """Record the phases of one page load attempt in the page load histogram"""
+    for phase in ('load', 'wait', 'parse'):
+        if report[phase]:
+            PAGE_LOAD_SECONDS.observe(report[phase], phase=phase)
+
+def safe_get_page(driver, url, retries=3, deadline=180, ready_timeout=30, parse=None, guard=None):
+    """Safely load a page with retries.
+
+    Each attempt waits only until the course table has data rows, then runs
+    `parse` (if given) on the page source. Failed attempts back off with
+    jittered exponential delays, and no attempt starts past `deadline`
+    seconds. Returns a report with the attempt number, the seconds spent
+    loading, waiting and parsing, and the parse result.
+
+    With a RegistrarGuard, every attempt takes a token first and reports
+    its outcome; once the breaker opens, the remaining attempts are given
+    up at once by raising RegistrarUnavailable. Parse errors are our own
+    bug, not the registrar's, so they never count as a failed request.
+    """
+    started = time.time()
     for attempt in range(retries):
+        remaining = deadline - (time.time() - started)
+        report = {'attempt': attempt + 1, 'load': 0.0, 'wait': 0.0, 'parse': 0.0, 'result': None}
+        if guard is not None:
+            guard.acquire()
+        phase = 'load'
+        phase_started = time.time()
         try:
             print(f"Attempt {attempt + 1}: Loading {url}")
+            driver.set_page_load_timeout(max(1, min(90, remaining)))
             driver.get(url)
+            report['load'] = time.time() - phase_started
             
-            # Wait for page to fully load
-            WebDriverWait(driver, 30).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
+            # Wait until the course table is actually there, not a fixed amount of time
+            phase = 'wait'
+            phase_started = time.time()
+            remaining = deadline - (time.time() - started)
+            WebDriverWait(driver, max(1, min(ready_timeout, remaining)), poll_frequency=0.25).until(course_table_ready)
+            report['wait'] = time.time() - phase_started
             
-            # Additional wait to ensure content is loaded
-            time.sleep(5)
+            if parse is not None:
+                phase = 'parse'
+                phase_started = time.time()
+                report['result'] = parse(driver.page_source)
+                report['parse'] = time.time() - phase_started
             
-            print(f"✅ Page loaded successfully on attempt {attempt + 1}")
-            return True
+            observe_attempt(report)
+            if guard is not None:
+                guard.record_success()
+            print(f"✅ Page loaded successfully on attempt {attempt + 1} "
+                  f"(load {report['load']:.2f}s, wait {report['wait']:.2f}s, parse {report['parse']:.2f}s)")
+            return report
             
         except Exception as e:
-            print(f"❌ Attempt {attempt + 1} failed: {str(e)}")
-            if attempt < retries - 1:
-                time.sleep(10)  # Wait before retry
-            else:
+            report[phase] = time.time() - phase_started
+            observe_attempt(report)
+            if guard is not None:
+                # The registrar answered if we got as far as parsing; only load and wait errors count against it
+                if phase == 'parse':
+                    guard.record_success()
+                else:
+                    guard.record_failure()
+            print(f"❌ Attempt {attempt + 1} failed during {phase}: {str(e)} "
+                  f"(load {report['load']:.2f}s, wait {report['wait']:.2f}s, parse {report['parse']:.2f}s)")
+            
+            delay = backoff_delay(attempt)
+            if attempt >= retries - 1 or time.time() - started + delay >= deadline:
                 raise e
+            time.sleep(delay)  # Wait before retry
     
-    return False
\ No newline at end of file
+    return None
+
+def driver_rss_mb(driver):
+    """Resident memory of chromedriver and every Chrome process under it, in MB.
+
+    Reads /proc, so it returns None where that is unavailable (e.g. macOS).
+    """
+    try:
+        pending = [driver.service.process.pid]
+    except AttributeError:
+        return None
+
+    total_kb = 0
+    try:
+        while pending:
+            pid = pending.pop()
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        if total_kb == 0:
+            return None
+    return total_kb / 1024
+
+class _PooledDriver:
+    """A pooled driver plus the bookkeeping used to decide when to recycle it"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+class DriverPool:
+    """Long-lived headless Chrome instances reused across scrapes.
+
+    Drivers are health-checked before they are handed out, and recycled after
+    `max_pages` page loads or once their process tree grows past `max_rss_mb`,
+    since --single-process Chrome leaks memory over time.
+    """
+
+    def __init__(self, size=1, max_pages=50, max_rss_mb=600, factory=setupDriver):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        """Check out a healthy driver, starting one if none is idle"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No browser available in the driver pool")
+        try:
+            while True:
+                try:
+                    entry = self._idle.get_nowait()
+                except queue.Empty:
+                    return _PooledDriver(self._factory())
+                if self._is_healthy(entry):
+                    return entry
+                print("♻️ Pooled driver failed its health check. Replacing it.")
+                self._quit(entry)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, entry, broken=False):
+        """Return a driver to the pool, recycling it if it is worn out"""
+        try:
+            entry.pages += 1
+            reason = "pool is closed" if self._closed else self._recycle_reason(entry, broken)
+            if reason:
+                print(f"♻️ Recycling pooled driver after {entry.pages} page(s): {reason}")
+                self._quit(entry)
+            else:
+                self._idle.put(entry)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Borrow a driver for one page load"""
+        entry = self.acquire(timeout)
+        broken = False
+        try:
+            yield entry.driver
+        except RegistrarUnavailable:
+            # Refused before the browser was used; it is still healthy
+            raise
+        except Exception:
+            # A failed load can leave the browser in a bad state; start fresh next time
+            broken = True
+            raise
+        finally:
+            self.release(entry, broken)
+
+    def close_all(self):
+        """Quit every idle driver; drivers checked out right now are quit when they are returned"""
+        self._closed = True
+        closed = 0
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(entry)
+            closed += 1
+        if closed:
+            print(f"✅ Closed {closed} pooled driver(s)")
+
+    def _recycle_reason(self, entry, broken):
+        if broken:
+            return "page load failed"
+        if self.max_pages and entry.pages >= self.max_pages:
+            return f"reached {self.max_pages} pages"
+        if self.max_rss_mb:
+            rss = driver_rss_mb(entry.driver)
+            if rss is not None and rss > self.max_rss_mb:
+                return f"RSS {rss:.0f} MB over {self.max_rss_mb} MB"
+        return None
+
+    def _is_healthy(self, entry):
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _quit(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    """Process-wide DriverPool, configured from the environment"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                size=int(os.environ.get('DRIVER_POOL_SIZE', 1)),
+                max_pages=int(os.environ.get('DRIVER_MAX_PAGES', 50)),
+                max_rss_mb=int(os.environ.get('DRIVER_MAX_RSS_MB', 600)),
+            )
+        return _pool
+
+def close_driver_pool():
+    """Quit the process-wide pool's browsers, if the pool was ever created"""
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.close_all()
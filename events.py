@@ -0,0 +1,171 @@
+import json
+import queue
+import threading
+import time
+
+# Change kinds that move a section's seat count
+SEAT_KINDS = ('seats_opened', 'seats_closed', 'seats_changed', 'section_added', 'section_removed')
+
+
+def format_event(event, data):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class _Client:
+    """One connected stream: the CRNs it watches and its pending messages"""
+
+    def __init__(self, crns, max_queue):
+        self.crns = frozenset(crns)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+
+class SeatEventBroker:
+    """Fans seat-count changes out to every connected Server-Sent Events client.
+
+    The broker listens to the CatalogCache, so messages go out as soon as a
+    snapshot is published, in the thread that published it; clients are
+    looked up by CRN and each gets the message on its own bounded queue.
+    A client that falls too far behind is told to resync instead of
+    buffering without limit. Stream threads just block on their queue, so
+    each open stream ties up one server thread; at most `max_clients`
+    streams are accepted at a time, leaving the rest of the threads for
+    ordinary requests.
+
+    Web workers that do not run the poller learn about new snapshots from
+    `load_newer` (a callable returning a newer snapshot or None), which one
+    background thread checks every `check_interval` seconds while at least
+    one client is connected.
+    """
+
+    def __init__(self, cache, load_newer=None, check_interval=2.0, heartbeat=15.0, max_queue=100, max_clients=8):
+        self._cache = cache
+        self._load_newer = load_newer
+        self.check_interval = check_interval
+        self.heartbeat = heartbeat
+        self.max_queue = max_queue
+        self.max_clients = max_clients
+
+        self._by_crn = {}  # crn -> set of clients
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._closed = False
+        cache.add_listener(self.publish)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def subscribe(self, crns):
+        """Register a stream for these CRNs, or return None if the broker is full or closed"""
+        client = _Client(crns, self.max_queue)
+        with self._lock:
+            if self._closed or (self.max_clients and len(self._clients) >= self.max_clients):
+                return None
+            self._clients.add(client)
+            for crn in client.crns:
+                self._by_crn.setdefault(crn, set()).add(client)
+            if self._load_newer is not None and (self._watcher is None or not self._watcher.is_alive()):
+                self._watcher = threading.Thread(target=self._watch, name="seat-events", daemon=True)
+                self._watcher.start()
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+            for crn in client.crns:
+                clients = self._by_crn.get(crn)
+                if clients is not None:
+                    clients.discard(client)
+                    if not clients:
+                        del self._by_crn[crn]
+
+    def publish(self, snapshot, changes):
+        """Queue each seat change for the clients watching its CRN"""
+        by_client = {}
+        with self._lock:
+            if not self._clients:
+                return
+            for change in changes:
+                if change['kind'] not in SEAT_KINDS:
+                    continue
+                for client in self._by_crn.get(change['crn'], ()):
+                    by_client.setdefault(client, []).append({
+                        'crn': change['crn'],
+                        'kind': change['kind'],
+                        'available_seats': change.get('available_seats', 0),
+                        'before': change.get('before'),
+                    })
+            clients = list(self._clients)
+
+        catalog = {'version': snapshot.version, 'fetched_at': snapshot.fetched_at}
+        for client in clients:
+            self._put(client, format_event('catalog', catalog))
+            for seats in by_client.get(client, ()):
+                self._put(client, format_event('seats', dict(seats, version=snapshot.version)))
+
+    def _put(self, client, message):
+        if client.overflowed:
+            return
+        try:
+            client.queue.put_nowait(message)
+        except queue.Full:
+            # Too far behind; drop what is queued and have the page reload its state
+            client.overflowed = True
+            while True:
+                try:
+                    client.queue.get_nowait()
+                except queue.Empty:
+                    break
+            client.queue.put_nowait(format_event('resync', {}))
+
+    def stream(self, client):
+        """Messages for one client, starting with the current seats of its CRNs"""
+        try:
+            snapshot = self._cache.snapshot
+            if snapshot is not None:
+                seats = {crn: (snapshot.get(crn)['available_seats'] if crn in snapshot else None)
+                         for crn in client.crns}
+                yield format_event('snapshot', {'version': snapshot.version, 'fetched_at': snapshot.fetched_at,
+                                                'seats': seats})
+            while not self._closed:
+                try:
+                    message = client.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment line; lets the server notice a client that went away
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+                if client.overflowed:
+                    break
+        finally:
+            self.unsubscribe(client)
+
+    def close(self):
+        """End every open stream"""
+        self._closed = True
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def _watch(self):
+        while not self._closed:
+            time.sleep(self.check_interval)
+            with self._lock:
+                if not self._clients:
+                    self._watcher = None
+                    return
+            try:
+                snapshot = self._load_newer()
+                if snapshot is not None:
+                    self._cache.publish(snapshot)
+            except Exception as e:
+                print(f"Could not check for a newer catalog snapshot: {str(e)}")
@@ -0,0 +1,38 @@
+import os
+import signal
+import threading
+
+# Web workers only serve requests; the monitor runs in whichever process holds the poller lease
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Each open /api/stream connection holds one thread while it waits for seat changes;
+# MAX_EVENT_STREAMS (half of these by default) caps how many threads streams may take
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# Leave workers time to drain the outbox on shutdown
+graceful_timeout = int(os.environ.get('SHUTDOWN_TIMEOUT', 30)) + 5
+
+
+def post_worker_init(worker):
+    # Each web worker may host the monitor; the leader lease lets only one of them poll
+    from app import broker, monitor
+    from config import Config
+    if Config.EMBEDDED_MONITOR:
+        monitor.start()
+
+    # Open event streams never finish on their own, and the worker waits for in-flight
+    # requests before worker_exit runs; end them as soon as graceful shutdown starts
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def close_streams_then_exit(signum, frame):
+        threading.Thread(target=broker.close, name="close-streams", daemon=True).start()
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, close_streams_then_exit)
+
+
+def worker_exit(server, worker):
+    # Drain the outbox, quit browsers and release the lease before the worker exits
+    from app import monitor
+    from config import Config
+    monitor.shutdown(timeout=Config.SHUTDOWN_TIMEOUT)
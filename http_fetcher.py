@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from course_parser import parse_form_fields
+from metrics import PAGE_LOAD_SECONDS
+from registrar_guard import get_registrar_guard
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class CatalogSession:
+    """Keep-alive HTTP client for courseSchedule.aspx.
+
+    One pooled requests.Session is reused for every scrape, so repeated polls
+    skip the TCP/TLS handshake. When `term` is set and the page does not
+    already show that term, the ASP.NET form is posted back with its
+    viewstate fields and the term select changed, as the browser would.
+    Every GET and postback goes through `guard` (a RegistrarGuard) when set.
+    """
+
+    def __init__(self, url, term=None, term_field=None, timeout=30, pool_size=4, guard=None):
+        self.url = url
+        self.term = term
+        self.term_field = term_field
+        self.timeout = timeout
+        self.guard = guard
+        self._validators = {}  # Conditional request headers from the last full response
+
+        self._session = requests.Session()
+        self._session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml',
+        })
+        # No transport-level retries: one guarded request is one request, and the
+        # RegistrarGuard and poll scheduler decide when to try again
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def fetch(self, parse=None):
+        """Return the catalog page HTML for the configured term, or None if it has not changed.
+
+        Without a term postback the GET is conditional on the ETag and
+        Last-Modified of the previous response, when the server sent them.
+        With `parse`, returns `parse(html)` instead (`parse(None)` when not
+        modified), and only a page that parses to something is remembered
+        for the next conditional GET: an error or maintenance page is not.
+        """
+        started = time.time()
+        headers = None if self.term else self._validators
+        with self._guarded():
+            response = self._session.get(self.url, timeout=self.timeout, headers=headers)
+            response.raise_for_status()
+        if response.status_code == 304:
+            PAGE_LOAD_SECONDS.observe(time.time() - started, phase='http')
+            print("✅ Course catalog not modified since the last fetch")
+            return parse(None) if parse else None
+        html = response.text
+        validators = {name: response.headers[header] for name, header in
+                      (('If-None-Match', 'ETag'), ('If-Modified-Since', 'Last-Modified'))
+                      if header in response.headers}
+        self._validators = {} if parse else validators
+
+        if self.term:
+            html = self._select_term(html)
+
+        elapsed = time.time() - started
+        PAGE_LOAD_SECONDS.observe(elapsed, phase='http')
+        print(f"✅ Fetched course catalog over HTTP in {elapsed:.2f}s ({len(html) / 1024:.0f} KB)")
+        if not parse:
+            return html
+        result = parse(html)
+        if result:
+            self._validators = validators
+        return result
+
+    def _select_term(self, html):
+        fields, selects = parse_form_fields(html)
+        field = self.term_field or next((name for name in selects if 'term' in name.lower()), None)
+        if field is None or field not in selects:
+            raise Exception(f"Term selector not found on the catalog page (wanted term {self.term})")
+
+        select = selects[field]
+        if select['selected'] == self.term:
+            return html
+        if self.term not in select['options']:
+            raise Exception(f"Term {self.term} is not offered. Available terms: {select['options']}")
+
+        # Replay the select's autopostback with the page's viewstate
+        form = dict(fields)
+        form[field] = self.term
+        form['__EVENTTARGET'] = field
+        form['__EVENTARGUMENT'] = ''
+        with self._guarded():
+            response = self._session.post(self.url, data=form, timeout=self.timeout)
+            response.raise_for_status()
+        print(f"📅 Selected term {self.term} via postback")
+        return response.text
+
+    def _guarded(self):
+        return self.guard.request() if self.guard is not None else nullcontext()
+
+    def close(self):
+        self._session.close()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(url):
+    """Process-wide CatalogSession, configured from the environment"""
+    global _session
+    with _session_lock:
+        if _session is None or _session.url != url:
+            _session = CatalogSession(
+                url,
+                term=os.environ.get('SCRAPER_TERM') or None,
+                term_field=os.environ.get('SCRAPER_TERM_FIELD') or None,
+                timeout=int(os.environ.get('SCRAPER_HTTP_TIMEOUT', 30)),
+                guard=get_registrar_guard(),
+            )
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def fetch_catalog_html(url, parse=None):
+    return get_session(url).fetch(parse)
@@ -0,0 +1,251 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds, from fast parses up to slow page loads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, either set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, function=None):
+        super().__init__(name, documentation)
+        self._value = 0
+        self._function = function
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception:
+                return []
+        else:
+            with self._lock:
+                value = self._value
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution of observed values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time spent in a with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            series = {key: (list(buckets), total, count) for key, (buckets, total, count) in self._series.items()}
+        lines = []
+        for key, (buckets, total, count) in sorted(series.items()):
+            for bound, bucket_count in zip(self.buckets, buckets):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def collect(self):
+        """{name: [kind, documentation, sample lines]} for every metric, in registration order.
+
+        JSON-serializable, so a process can publish its metrics for another one to render.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: [metric.kind, metric.documentation, metric._samples()] for metric in metrics}
+
+
+def _with_label(sample, name, value):
+    """Add one label to a rendered sample line such as 'metric{a="b"} 3'"""
+    label = f'{name}="{value}"'
+    i = min(pos for pos in (sample.find('{'), sample.find(' ')) if pos != -1)
+    if sample[i] == '{':
+        return f"{sample[:i + 1]}{label},{sample[i + 1:]}"
+    return f"{sample[:i]}{{{label}}}{sample[i:]}"
+
+
+def render_processes(collections):
+    """Render {process: Registry.collect()} from several processes as one exposition.
+
+    Each metric is described once and every sample gets a `process` label,
+    so counters kept by the poller's process show up on any web worker.
+    """
+    merged = {}
+    for process, collected in collections.items():
+        for name, (kind, documentation, samples) in collected.items():
+            entry = merged.setdefault(name, [kind, documentation, []])
+            entry[2].extend(_with_label(sample, "process", process) for sample in samples)
+    lines = []
+    for name, (kind, documentation, samples) in merged.items():
+        lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"])
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type Prometheus expects from a text-format endpoint
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, function=None):
+    return REGISTRY.register(Gauge(name, documentation, function))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Scraping hot path
+BROWSER_STARTUP_SECONDS = histogram(
+    "openseat_browser_startup_seconds", "Time to start a headless Chrome driver")
+PAGE_LOAD_SECONDS = histogram(
+    "openseat_page_load_seconds", "Time spent in each phase of a catalog page load attempt", ("phase",))
+TABLE_PARSE_SECONDS = histogram(
+    "openseat_table_parse_seconds", "Time to parse the course table out of the catalog page")
+ROWS_PARSED = histogram(
+    "openseat_rows_parsed", "Course rows parsed per scrape",
+    buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000))
+SCRAPE_SECONDS = histogram(
+    "openseat_scrape_seconds", "End-to-end catalog scrape time", ("backend",))
+SCRAPES_TOTAL = counter(
+    "openseat_scrapes_total", "Catalog scrapes by backend and result", ("backend", "result"))
+REGISTRAR_REQUESTS_TOTAL = counter(
+    "openseat_registrar_requests_total",
+    "Requests to the registrar by outcome (success, failure, circuit_open or rate_limited)", ("outcome",))
+
+# Catalog cache
+CACHE_REQUESTS_TOTAL = counter(
+    "openseat_catalog_cache_requests_total", "Catalog cache reads by result (hit, stale or miss)", ("result",))
+
+# Notification hot path
+NOTIFICATION_QUEUE_DEPTH = gauge(
+    "openseat_notification_queue_depth", "Emails waiting in the outbox")
+SMTP_SEND_SECONDS = histogram(
+    "openseat_smtp_send_seconds", "Time to hand one email to the SMTP server")
+SEAT_OPEN_TO_EMAIL_SECONDS = histogram(
+    "openseat_seat_open_to_email_seconds", "Time from detecting an open seat to sending the email",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800))
+EMAILS_TOTAL = counter(
+    "openseat_emails_total", "Emails by result (sent, retry or failed)", ("result",))
@@ -0,0 +1,316 @@
+import sys
+import threading
+import time
+
+from catalog import CatalogCache
+from metrics import REGISTRY
+from notifier import Notifier, Outbox
+from poller import CatalogPoller
+from scheduler import AdaptiveScheduler, parse_windows
+from rules import describe_rule
+from store import LeaderLease, ProcessStatusStore, SeatHistory, SnapshotStore, SubscriptionStore, WatchRuleStore
+from subscriptions import NotificationFanout
+
+
+def scrape_catalog():
+    """Scrape the registrar, importing the scraping stack only when a scrape actually runs"""
+    from scraper import scrapeCourses
+    return scrapeCourses()
+
+
+class CatalogSource:
+    """Catalog loader for a CatalogCache that shares scrapes between processes.
+
+    The process holding the poller lease scrapes the registrar and saves the
+    result to the SnapshotStore; every other process loads the newest saved
+    snapshot instead of scraping. A process that has no catalog yet also
+    starts from the saved snapshot, even if it is stale, so a cold web
+    worker serves data at once while the cache revalidates it. If no poller
+    is alive, or nothing has been saved yet, any process may scrape so the
+    web app never goes without data.
+
+    A stored snapshot older than `max_age` seconds means the poller has
+    stopped refreshing it (it skips scraping while nobody is subscribed), so
+    apart from that cold start the process scrapes for itself instead.
+
+    When the scraper reports an unchanged page (by handing back the very
+    dict it returned last time) and that scrape is still the newest stored
+    snapshot, the snapshot is only marked fresh instead of saved again.
+    """
+
+    def __init__(self, scrape, snapshots, lease, max_age=None):
+        self._scrape = scrape
+        self._snapshots = snapshots
+        self._lease = lease
+        self.max_age = max_age
+        self._last = None
+        self._scraped = None  # (courses, version) of this process's last scrape
+
+    def __call__(self):
+        # The leader always scrapes; it must never match subscriptions against old data
+        if not self._lease.held() and (self._last is None or self._lease.current() is not None):
+            cold = self._last is None
+            snapshot = self._load()
+            if snapshot is not None and (cold or self.max_age is None or snapshot.age <= self.max_age):
+                return snapshot
+
+        courses = self._scrape()
+        if not courses:
+            return courses
+        head = self._snapshots.head()
+        if self._scraped and courses is self._scraped[0] and head and head[0] == self._scraped[1] == self._last.version:
+            self._last = self._last.refreshed(self._snapshots.touch(head[0]))
+            return self._last
+        self._last = self._snapshots.save(courses, previous=self._last)
+        self._scraped = (courses, self._last.version)
+        return self._last
+
+    def load_newer(self):
+        """Newest stored snapshot if another process saved one since this source last returned, else None"""
+        head = self._snapshots.head()
+        known = self._last.version if self._last else 0
+        if head is None or head[0] <= known:
+            return None
+        snapshot = self._snapshots.latest(newer_than=known, previous=self._last)
+        if snapshot is not None:
+            self._last = snapshot
+        return snapshot
+
+    def _load(self):
+        """Newest stored snapshot, only reading the courses when the version changed"""
+        head = self._snapshots.head()
+        if head is None:
+            return None
+        if self._last is not None and head[0] == self._last.version:
+            # Same catalog, possibly confirmed unchanged by a later scrape
+            if head[1] > self._last.fetched_at:
+                self._last = self._last.refreshed(head[1])
+            return self._last
+        snapshot = self._snapshots.latest(newer_than=self._last.version if self._last else 0, previous=self._last)
+        if snapshot is not None:
+            self._last = snapshot
+        return self._last
+
+
+class Monitor:
+    """Catalog poller and email senders, run by whichever process holds the leader lease.
+
+    Any number of web workers (and `python worker.py`) can start a Monitor;
+    they all compete for one lease in the database, and only the holder runs
+    the poller and SMTP workers. If the holder dies, its lease expires after
+    `lease.ttl` seconds and another process takes over.
+    """
+
+    def __init__(self, config, subscriptions, cache, lease, history=None, source=None, rules=None, statuses=None):
+        self.config = config
+        self.subscriptions = subscriptions
+        self.rules = rules  # Watch rules beyond "this CRN has a seat"
+        self.cache = cache
+        self.lease = lease
+        self.source = source  # CatalogSource behind the cache, when snapshots are shared
+        self.statuses = statuses  # Where the lease loop publishes this process's metrics for the others
+
+        # Seat counts over time, written by the leader only so each change is stored once
+        self.history = history
+        if history is not None:
+            cache.add_listener(self._record_history)
+
+        # Durable outbox drained by background SMTP workers
+        self.notifier = Notifier(Outbox(config.DATABASE_PATH), workers=config.SMTP_WORKERS,
+                                 retention=config.OUTBOX_RETENTION_DAYS * 86400)
+
+        # Notifies every subscriber of a CRN in parallel
+        self.fanout = NotificationFanout(self.notify_subscriber, max_workers=config.NOTIFY_WORKERS)
+
+        # Polls faster when seats churn or registration is open, slower when nothing changes
+        self.scheduler = AdaptiveScheduler(
+            base=config.POLL_INTERVAL,
+            min_interval=config.POLL_MIN_INTERVAL,
+            max_interval=config.POLL_MAX_INTERVAL,
+            window_interval=config.POLL_MIN_INTERVAL,
+            max_requests_per_hour=config.REGISTRAR_MAX_REQUESTS_PER_HOUR,
+            windows=parse_windows(config.REGISTRATION_WINDOWS)
+        )
+
+        # One poller scrapes the catalog for every watched CRN
+        self.poller = CatalogPoller(cache, subscriptions, self.fanout,
+                                    interval=config.POLL_INTERVAL, scheduler=self.scheduler, rules=rules)
+
+        self._leading = False
+        self._subscription_id = 0  # Newest subscription seen by the lease loop
+        self._rule_id = 0  # Newest watch rule seen by the lease loop
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def leading(self):
+        """Whether this process is currently running the poller"""
+        return self._leading
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def leader(self):
+        """(holder, seconds left) of the live lease in any process, or None"""
+        lease = self.lease.current()
+        if lease is None:
+            return None
+        return lease[0], max(0.0, lease[1] - time.time())
+
+    def notify_subscriber(self, crn, course_info, user_data, detected_at=None):
+        """Queue an email telling a user their course has an open seat and drop their request or rule"""
+        subject = f"🎉 Seat Available in {course_info['subject']} {course_info['course_number']}"
+        rule = f"Your watch rule: {describe_rule(user_data)}\n" if 'rule_id' in user_data else ""
+
+        body = f"""Hi {user_data['name']},
+
+Great news! A seat has become available in your requested course:
+
+Course: {course_info['subject']} {course_info['course_number']} - {course_info['title']}
+CRN: {crn}
+Available Seats: {course_info['available_seats']}
+Instructor: {course_info['instructor']}
+Schedule: {course_info['days']} at {course_info['time']}
+{rule}
+Please log into your student portal immediately to register for this course.
+
+Best of luck!
+Open Seat Notification System
+"""
+
+        self.notifier.enqueue(user_data['email'], subject, body, detected_at)
+        print(f"Notification queued for {user_data['email']} for CRN {crn}")
+
+        # The outbox is durable, so the request can be dropped as soon as the email is queued
+        if 'rule_id' in user_data:
+            self.rules.remove(user_data['rule_id'])
+        else:
+            self.subscriptions.remove(crn, user_data['email'])
+
+    def subscriptions_changed(self):
+        """Let an idle poller in this process pick up a new subscription right away"""
+        if self._leading:
+            self.poller.wake()
+
+    def start(self):
+        """Start competing for the leader lease in the background"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="monitor-lease", daemon=True)
+        self._thread.start()
+
+    def shutdown(self, timeout=30):
+        """Stop polling, send queued emails, quit browsers and hand the lease over.
+
+        Everything waits at most `timeout` seconds in total; emails that could
+        not be sent in time stay in the outbox for the next leader. A monitor
+        that has been shut down cannot be started again.
+        """
+        deadline = time.time() + timeout
+        remaining = lambda: max(0.0, deadline - time.time())
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(remaining())
+
+        # Let a scrape in progress finish so its browser is returned to the pool
+        self.poller.stop(remaining())
+        self.fanout.shutdown(wait=True)
+        self.notifier.stop(remaining(), drain=self._leading)
+
+        # Quit pooled browsers so no Chrome process outlives the monitor
+        scraper = sys.modules.get('scraper')
+        if scraper is not None:
+            scraper.closeScrapers()
+
+        if self._leading:
+            # Release the lease so a standby process takes over without waiting for it to expire
+            self._leading = False
+            self.lease.release()
+        if self.statuses is not None:
+            self.statuses.remove(self.lease.holder)
+        self.subscriptions.checkpoint()
+        print("Monitor shut down")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                leader = self.lease.acquire()
+            except Exception as e:
+                # Keep the current role; the lease outlives a few missed renewals
+                print(f"Could not renew the poller lease: {str(e)}")
+            else:
+                if leader and not self._leading:
+                    self._lead()
+                elif not leader and self._leading:
+                    self._follow()
+                if self._leading:
+                    self._check_subscriptions()
+            self._publish_status()
+            self._stop_event.wait(self.lease.ttl / 3)
+
+    def _publish_status(self):
+        # Counters and the poll schedule live in the leader; web workers in other processes read them from here
+        if self.statuses is None:
+            return
+        try:
+            self.statuses.publish(self.lease.holder, REGISTRY.collect(),
+                                  self.scheduler.status() if self._leading else None, max_age=self.lease.ttl * 3)
+        except Exception as e:
+            print(f"Could not publish process metrics: {str(e)}")
+
+    def published_metrics(self):
+        """{process: Registry.collect()} for this process and every other live one"""
+        collections = self.statuses.metrics(self.lease.ttl) if self.statuses is not None else {}
+        collections[self.lease.holder] = REGISTRY.collect()
+        return collections
+
+    def poll_schedule(self):
+        """The adaptive poll schedule of whichever process is polling, or None"""
+        if self._leading:
+            return self.scheduler.status()
+        leader = self.leader()
+        if leader is None or self.statuses is None:
+            return None
+        return self.statuses.poll_schedule(leader[0])
+
+    def _check_subscriptions(self):
+        # Subscriptions added by web workers in other processes wake an idle poller too
+        last_id = self.subscriptions.last_id()
+        last_rule_id = self.rules.last_id() if self.rules is not None else 0
+        if last_id > self._subscription_id or last_rule_id > self._rule_id:
+            self._subscription_id, self._rule_id = last_id, last_rule_id
+            self.poller.wake()
+
+    def _record_history(self, snapshot, changes):
+        if self._leading:
+            self.history.record(snapshot)
+
+    def _lead(self):
+        print(f"Acquired the poller lease as {self.lease.holder}")
+        if self.history is not None:
+            self.history.reset()
+        self._leading = True
+        self.notifier.start()
+        self.poller.start()
+
+    def _follow(self):
+        print(f"Gave up the poller lease as {self.lease.holder}")
+        self._leading = False
+        self.poller.stop()
+        self.notifier.stop()
+
+
+def create_monitor(config, scrape=scrape_catalog, legacy_json=None):
+    """Wire the subscription store, shared catalog cache and monitor for one process"""
+    subscriptions = SubscriptionStore(config.DATABASE_PATH, legacy_json=legacy_json)
+    lease = LeaderLease(config.DATABASE_PATH, ttl=config.LEADER_LEASE_TTL)
+    snapshots = SnapshotStore(config.DATABASE_PATH, keep=config.SNAPSHOT_HISTORY)
+
+    # Every page, API call and the poller read the catalog through this one cache
+    source = CatalogSource(scrape, snapshots, lease, max_age=config.CATALOG_CACHE_TTL + config.CATALOG_MAX_STALE)
+    cache = CatalogCache(source, ttl=config.CATALOG_CACHE_TTL, max_stale=config.CATALOG_MAX_STALE)
+    return Monitor(config, subscriptions, cache, lease, history=SeatHistory(config.DATABASE_PATH), source=source,
+                   rules=WatchRuleStore(config.DATABASE_PATH), statuses=ProcessStatusStore(config.DATABASE_PATH))
@@ -1,17 +1,31 @@
-import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sqlite3
+import threading
+import time
 
-def send_email(recipient_email, subject, body):
+from backoff import backoff_delay
+from metrics import EMAILS_TOTAL, SEAT_OPEN_TO_EMAIL_SECONDS, SMTP_SEND_SECONDS
+
+# SMTP server settings; point these at a local stand-in (e.g. aiosmtpd) for testing
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 465))
+SMTP_SSL = os.getenv('SMTP_SSL', '1').lower() not in ('0', 'false', 'no')
+
+def get_credentials():
     # Get credentials from environment variables
     sender_email = os.getenv('SENDER_EMAIL')
     sender_password = os.getenv('SENDER_PASSWORD')
-    
+
     # Check if credentials are available
     if not sender_email or not sender_password:
         raise ValueError("Email credentials not found. Please set SENDER_EMAIL and SENDER_PASSWORD environment variables.")
-    
+    return sender_email, sender_password
+
+def build_message(sender_email, recipient_email, subject, body):
+    # The email package is only needed once something is sent, not at web startup
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
     # Create the email
     message = MIMEMultipart()
     message["From"] = sender_email
@@ -19,13 +33,312 @@ def send_email(recipient_email, subject, body):
     message["Subject"] = subject
 
     message.attach(MIMEText(body, "plain"))
+    return message
+
+def connect_smtp(sender_email, sender_password, timeout=30):
+    """Open an authenticated connection to the configured SMTP server"""
+    import smtplib
+    if SMTP_SSL:
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=timeout)
+    else:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=timeout)
+    server.ehlo()
+    # Local stand-in servers usually do not offer AUTH
+    if server.has_extn('auth'):
+        server.login(sender_email, sender_password)
+    return server
+
+def send_email(recipient_email, subject, body):
+    """Send one email right away over a fresh connection"""
+    sender_email, sender_password = get_credentials()
+    message = build_message(sender_email, recipient_email, subject, body)
 
     try:
-        # Connect to Gmail's SMTP server
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, recipient_email, message.as_string())
+        # Connect to the SMTP server
+        with SMTP_SEND_SECONDS.time():
+            with connect_smtp(sender_email, sender_password) as server:
+                server.sendmail(sender_email, recipient_email, message.as_string())
         print(f"✅ Email sent successfully to {recipient_email}")
     except Exception as e:
         print(f"❌ Failed to send email: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e
+
+
+class Outbox:
+    """Durable SQLite queue of outgoing emails.
+
+    Messages survive restarts: anything still pending, or claimed by a worker
+    that died mid-send, is picked up again when the senders start.
+    """
+
+    def __init__(self, path="openseat.db", max_attempts=5):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recipient TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                detected_at REAL,
+                sent_at REAL,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+
+    def requeue_unfinished(self):
+        """Put messages claimed by a worker that never finished back in the queue.
+
+        Only call this from the process that is about to start the senders;
+        other processes may open the outbox while the senders are running.
+        """
+        with self._lock:
+            cursor = self._conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+        return cursor.rowcount
+
+    def enqueue(self, recipient, subject, body, detected_at=None):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (recipient, subject, body, next_attempt_at, created_at, detected_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (recipient, subject, body, now, now, detected_at),
+            )
+            return cursor.lastrowid
+
+    def claim(self, limit=20):
+        """Atomically mark up to `limit` due messages as sending and return them"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, recipient, subject, body, attempts, detected_at FROM outbox "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (time.time(), limit),
+                ).fetchall()
+                self._conn.executemany("UPDATE outbox SET status = 'sending' WHERE id = ?",
+                                       [(row[0],) for row in rows])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        keys = ('id', 'recipient', 'subject', 'body', 'attempts', 'detected_at')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def mark_sent(self, message_id):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                               (time.time(), message_id))
+
+    def mark_failed(self, message, error):
+        """Schedule a retry with backoff, or give up after max_attempts"""
+        attempts = message['attempts'] + 1
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = 'failed', time.time()
+        else:
+            status, next_attempt_at = 'pending', time.time() + backoff_delay(attempts - 1, base=5.0, cap=300.0)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts, next_attempt_at, str(error)[:500], message['id']),
+            )
+        return status
+
+    def purge(self, older_than):
+        """Delete sent and failed messages finished more than `older_than` seconds ago.
+
+        Finished rows hold recipient addresses and bodies, so they are only
+        kept long enough to look into recent deliveries. Returns the number deleted.
+        """
+        cutoff = time.time() - older_than
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE (status = 'sent' AND sent_at < ?) "
+                "OR (status = 'failed' AND next_attempt_at < ?)", (cutoff, cutoff))
+        return cursor.rowcount
+
+    def depth(self):
+        """Messages waiting to be sent, including ones being sent right now"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')").fetchone()[0]
+
+    def next_due_in(self):
+        """Seconds until the next pending message is due, or None if none are pending"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SMTPSender:
+    """One authenticated SMTP connection reused for many messages"""
+
+    def __init__(self, idle_timeout=60):
+        self.idle_timeout = idle_timeout
+        self._server = None
+        self._last_used = 0.0
+
+    def send(self, recipient_email, subject, body):
+        import smtplib
+        sender_email, sender_password = get_credentials()
+        message = build_message(sender_email, recipient_email, subject, body).as_string()
+        with SMTP_SEND_SECONDS.time():
+            try:
+                self._connection(sender_email, sender_password).sendmail(sender_email, recipient_email, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                # The server dropped a kept-alive connection; reconnect once and resend
+                self.close()
+                self._connection(sender_email, sender_password).sendmail(sender_email, recipient_email, message)
+        self._last_used = time.time()
+
+    def _connection(self, sender_email, sender_password):
+        import smtplib
+        if self._server is not None and time.time() - self._last_used > self.idle_timeout:
+            # Servers close idle connections; check before reusing one
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+        if self._server is None:
+            self._server = connect_smtp(sender_email, sender_password)
+            self._last_used = time.time()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class Notifier:
+    """Background workers that drain the outbox over persistent SMTP connections.
+
+    Finished messages are purged once they are `retention` seconds old, when
+    the workers start and then at most every `purge_interval` seconds while idle.
+    """
+
+    def __init__(self, outbox, workers=2, batch_size=20, poll_interval=5, retention=7 * 86400,
+                 purge_interval=3600):
+        self.outbox = outbox
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+        self._purge_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._draining = threading.Event()
+        self._threads = []
+
+    def enqueue(self, recipient_email, subject, body, detected_at=None):
+        """Persist a message and wake a worker to send it"""
+        message_id = self.outbox.enqueue(recipient_email, subject, body, detected_at)
+        self._wake.set()
+        return message_id
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop_event.clear()
+        self._draining.clear()
+        requeued = self.outbox.requeue_unfinished()
+        if requeued:
+            print(f"📬 Requeued {requeued} unfinished email(s)")
+        self._purge()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"smtp-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Started {self.workers} SMTP worker(s)")
+
+    def stop(self, timeout=None, drain=False):
+        """Stop the workers. With `drain`, they first send every message that is due,
+        for up to `timeout` seconds; anything left stays in the outbox for next time."""
+        if drain:
+            self._draining.set()
+            self._wake.set()
+            deadline = time.time() + (timeout if timeout is not None else 30)
+            for thread in self._threads:
+                thread.join(max(0.0, deadline - time.time()))
+            print(f"📬 Drained the outbox ({self.outbox.depth()} email(s) left)")
+        self._stop_event.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        sender = SMTPSender()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    batch = self.outbox.claim(self.batch_size)
+                except Exception as e:
+                    print(f"❌ Could not read the outbox: {str(e)}")
+                    batch = []
+
+                if not batch:
+                    if self._draining.is_set():
+                        break
+                    self._wake.clear()
+                    if time.time() - self._purged_at >= self.purge_interval:
+                        self._purge()
+                    due_in = self.outbox.next_due_in()
+                    self._wake.wait(self.poll_interval if due_in is None else min(self.poll_interval, due_in))
+                    continue
+
+                for message in batch:
+                    self._send(sender, message)
+        finally:
+            sender.close()
+
+    def _purge(self):
+        # Only one worker purges per interval
+        with self._purge_lock:
+            if time.time() - self._purged_at < self.purge_interval:
+                return
+            self._purged_at = time.time()
+        try:
+            purged = self.outbox.purge(self.retention)
+        except Exception as e:
+            print(f"❌ Could not purge the outbox: {str(e)}")
+            return
+        if purged:
+            print(f"🧹 Purged {purged} finished email(s) older than {self.retention / 86400:g} day(s)")
+
+    def _send(self, sender, message):
+        try:
+            sender.send(message['recipient'], message['subject'], message['body'])
+        except Exception as e:
+            sender.close()
+            status = self.outbox.mark_failed(message, e)
+            EMAILS_TOTAL.inc(result='retry' if status == 'pending' else 'failed')
+            print(f"❌ Failed to send email to {message['recipient']} ({status}): {str(e)}")
+            return
+
+        self.outbox.mark_sent(message['id'])
+        EMAILS_TOTAL.inc(result='sent')
+        if message['detected_at']:
+            SEAT_OPEN_TO_EMAIL_SECONDS.observe(time.time() - message['detected_at'])
+            print(f"✅ Email sent to {message['recipient']} {time.time() - message['detected_at']:.2f}s after detection")
+        else:
+            print(f"✅ Email sent successfully to {message['recipient']}")
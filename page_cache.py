@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+
+
+class PageCache:
+    """Small LRU cache of rendered pages and API payloads.
+
+    Keys carry everything a page depends on (the subscription revision,
+    the catalog snapshot version, the query), so entries never need to be
+    invalidated: a change produces a new key and the stale entry ages out.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_render(self, key, render):
+        """Cached value for `key`, calling `render()` to fill it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Rendered outside the lock; two threads may both render one new key, which is harmless
+        value = render()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
@@ -0,0 +1,186 @@
+import threading
+import time
+import traceback
+
+from rules import RuleIndex, rule_accepts
+
+
+class CatalogPoller:
+    """Scrapes the catalog once per cycle and checks every subscription against it.
+
+    Scrape cost depends only on the poll interval: one scrape is shared by all
+    watched CRNs, and matching happens in memory against the published snapshot.
+    Scrapes go through the shared CatalogCache, so a poll cycle and a web request
+    that need fresh data at the same time share one scrape. After the first
+    full pass, only CRNs whose seats changed since the last matched snapshot,
+    plus CRNs that gained a subscriber, are matched. New subscriptions are read
+    from the store, so they may be added by any process.
+
+    Watch rules are matched the same way: each changed section looks up the
+    rules keyed on its CRN, course or instructor, and only rules added since
+    the last match (or every rule, on a full pass) are checked against the
+    whole snapshot.
+    """
+
+    def __init__(self, cache, subscriptions, fanout, interval=300, scheduler=None, rules=None):
+        self._cache = cache
+        self._subscriptions = subscriptions
+        self._rules = rules  # WatchRuleStore, when watch rules are enabled
+        self._fanout = fanout
+        self.interval = interval
+        self._scheduler = scheduler  # Picks the interval between cycles when set
+
+        self._matched_version = 0
+        self._seat_changes = None  # Seat changes seen by the last match, None if unknown
+        self._subscription_id = 0  # Newest subscription row seen by the last match
+        self._rule_id = 0  # Newest watch rule seen by the last match
+
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()  # Ends the current wait early
+        self._idle = False  # The last cycle was skipped for lack of subscriptions
+        self._thread = None
+
+    @property
+    def snapshot(self):
+        """Latest published snapshot, or None before the first successful scrape"""
+        return self._cache.snapshot
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wake(self):
+        """Poll right away if the poller is idling because nobody was subscribed.
+
+        A poller that is scraping on schedule is left alone, so waking it can
+        never push the scrape rate past the scheduler's limit.
+        """
+        if self._idle:
+            self._wake_event.set()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-poller", daemon=True)
+        self._thread.start()
+        print(f"Started catalog poller (every {self.interval}s)")
+
+    def stop(self, timeout=None):
+        """Stop polling; a scrape in progress is allowed to finish within `timeout`"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._cache.poll_interval = None
+        print("Stopped catalog poller")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in catalog poll cycle: {str(e)}")
+                print(traceback.format_exc())
+            interval = self._next_interval()
+            # Web reads in this process leave scraping to the poller while it polls
+            self._cache.poll_interval = None if self._idle else interval
+            self._wake_event.wait(interval)
+            self._wake_event.clear()
+
+    def _next_interval(self):
+        if self._scheduler is None:
+            return self.interval
+        self.interval, reason = self._scheduler.next_interval()
+        print(f"Next catalog poll in {self.interval:.0f}s: {reason}")
+        return self.interval
+
+    def run_once(self):
+        """Scrape once, publish the snapshot and match every subscription"""
+        self._idle = not len(self._subscriptions) and not (self._rules is not None and len(self._rules))
+        if self._idle:
+            print("No subscriptions to check. Skipping scrape.")
+            if self._scheduler is not None:
+                # Nothing changed that anyone watches, so let the churn estimate decay
+                self._scheduler.record(0)
+            return self.snapshot
+
+        # Reuse a snapshot a web request scraped moments ago instead of scraping again
+        snapshot = self._cache.refresh(max_age=self.interval / 2)
+        if snapshot is None:
+            print("No catalog snapshot available yet. Will retry next cycle.")
+            return None
+
+        self.match(snapshot)
+        if self._scheduler is not None and self._seat_changes is not None:
+            self._scheduler.record(self._seat_changes)
+        return snapshot
+
+    def match(self, snapshot):
+        """Fan out to every subscriber of each candidate CRN that has open seats"""
+        detected_at = time.time()
+        crns, full = self._crns_to_check(snapshot)
+        for crn in crns:
+            course_info = snapshot.get(crn)
+            if course_info and course_info['available_seats'] > 0:
+                subscribers = self._subscriptions.subscribers(crn)
+                if subscribers:
+                    self._fanout.dispatch(crn, course_info, subscribers, detected_at)
+            elif full:
+                available_seats = course_info['available_seats'] if course_info else 0
+                print(f"CRN {crn} still has {available_seats} seats. Continuing to monitor...")
+        if self._rules is not None:
+            self._match_rules(snapshot, crns, full, detected_at)
+
+    def _match_rules(self, snapshot, crns, full, detected_at):
+        """Fan out every watch rule satisfied by a changed section or, for new rules, by any section"""
+        new_rules, self._rule_id = self._rules.added_since(self._rule_id)
+        matched = {}  # rule id -> (crn, section, rule); each rule fires for one section only
+        if not full:
+            for crn in crns:
+                course_info = snapshot.get(crn)
+                if course_info is None or course_info['available_seats'] <= 0:
+                    continue
+                for rule in self._rules.candidates(crn, course_info):
+                    if rule['rule_id'] not in matched and rule_accepts(rule, crn, course_info):
+                        matched[rule['rule_id']] = (crn, course_info, rule)
+
+        scan = RuleIndex(self._rules.all() if full else new_rules)
+        if len(scan):
+            for crn, course_info in snapshot.courses.items():
+                if course_info['available_seats'] > 0:
+                    for rule in scan.matching(crn, course_info):
+                        matched.setdefault(rule['rule_id'], (crn, course_info, rule))
+
+        by_crn = {}
+        for crn, course_info, rule in matched.values():
+            by_crn.setdefault(crn, (course_info, []))[1].append(rule)
+        for crn, (course_info, rules) in by_crn.items():
+            self._fanout.dispatch(crn, course_info, rules, detected_at)
+        if matched:
+            print(f"Matched {len(matched)} watch rule(s) against snapshot v{snapshot.version}")
+
+    def _crns_to_check(self, snapshot):
+        """CRNs that may have become notifiable since the last match, and whether this is a full pass"""
+        # CRNs subscribed since the last match are checked even if their seats did not change
+        pending, self._subscription_id = self._subscriptions.added_since(self._subscription_id)
+
+        last_version, self._matched_version = self._matched_version, snapshot.version
+        self._seat_changes = None
+        if last_version == snapshot.version:
+            # Unchanged catalog (e.g. the scrape was short-circuited): no seat changes to match
+            self._seat_changes = 0 if last_version else None
+            return sorted(pending), False
+
+        changes, complete = self._cache.changes.since(last_version)
+        if last_version == 0 or not complete:
+            return self._subscriptions.crns(), True
+
+        self._seat_changes = sum(1 for change in changes if change['kind'].startswith('seats_'))
+
+        # Sections that now have seats, or whose instructor or time changed (watch rules may match them now)
+        opened = {change['crn'] for change in changes
+                  if change.get('available_seats', 0) > 0 or change['kind'] == 'details_changed'}
+        print(f"Matching {len(opened)} changed and {len(pending)} new CRN(s) against snapshot v{snapshot.version}")
+        return sorted(opened | pending), False
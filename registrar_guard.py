@@ -0,0 +1,181 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+from metrics import REGISTRAR_REQUESTS_TOTAL
+from store import _SQLiteStore
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class RegistrarUnavailable(Exception):
+    """Raised instead of sending a request while the breaker is open or the rate limit is spent"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"{reason}; retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RegistrarGuard(_SQLiteStore):
+    """Circuit breaker and token bucket shared by every request to the registrar site.
+
+    State lives in one SQLite row, so every thread and every process that
+    may scrape (the lease holder, or any web worker while no poller is
+    alive) draws from the same budget and sees the same breaker.
+
+    The bucket refills at `max_requests_per_hour` and holds up to `burst`
+    tokens; each page load or postback takes one. After `failure_threshold`
+    consecutive failures the breaker opens and requests fail at once for
+    `cooldown` seconds. Then one probe request is let through (half-open):
+    if it succeeds the breaker closes, otherwise it reopens for twice as
+    long, up to `max_cooldown`.
+    """
+
+    def __init__(self, path="openseat.db", name="registrar", max_requests_per_hour=120, burst=5,
+                 failure_threshold=3, cooldown=60, max_cooldown=900, probe_timeout=180):
+        super().__init__(path)
+        self.name = name
+        self.rate = max_requests_per_hour / 3600 if max_requests_per_hour else 0
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout  # A probe that never reports back frees the slot after this
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS circuit_breakers (
+                    name TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    failures INTEGER NOT NULL,
+                    opened_at REAL NOT NULL,
+                    open_for REAL NOT NULL,
+                    probe_until REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    refilled_at REAL NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO circuit_breakers VALUES (?, ?, 0, 0, ?, 0, ?, ?)",
+                         (name, CLOSED, cooldown, burst, time.time()))
+
+    def _row(self, conn):
+        row = conn.execute("SELECT state, failures, opened_at, open_for, probe_until, tokens, refilled_at "
+                           "FROM circuit_breakers WHERE name = ?", (self.name,)).fetchone()
+        return dict(zip(('state', 'failures', 'opened_at', 'open_for', 'probe_until', 'tokens', 'refilled_at'), row))
+
+    def _tokens(self, row, now):
+        if not self.rate:
+            return self.burst
+        return min(self.burst, row['tokens'] + (now - row['refilled_at']) * self.rate)
+
+    def _admit(self, row, now):
+        """Tokens left before this request, or RegistrarUnavailable if it must not be sent"""
+        if row['state'] == OPEN and now < row['opened_at'] + row['open_for']:
+            REGISTRAR_REQUESTS_TOTAL.inc(outcome='circuit_open')
+            raise RegistrarUnavailable("registrar circuit breaker is open", row['opened_at'] + row['open_for'] - now)
+        if row['state'] == HALF_OPEN and now < row['probe_until']:
+            REGISTRAR_REQUESTS_TOTAL.inc(outcome='circuit_open')
+            raise RegistrarUnavailable("registrar probe request in progress", row['probe_until'] - now)
+        tokens = self._tokens(row, now)
+        if tokens < 1:
+            REGISTRAR_REQUESTS_TOTAL.inc(outcome='rate_limited')
+            raise RegistrarUnavailable("registrar request budget spent", (1 - tokens) / self.rate)
+        return tokens
+
+    def check(self):
+        """Raise RegistrarUnavailable if a request would be refused right now, without taking a token.
+
+        Lets a scrape give up before doing anything costly, such as starting a browser.
+        """
+        self._admit(self._row(self._connection()), time.time())
+
+    def acquire(self):
+        """Take a token for one request, or raise RegistrarUnavailable without sending it"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = self._row(conn)
+            tokens = self._admit(row, now)
+            state, probe_until = row['state'], row['probe_until']
+            if state != CLOSED:
+                # Cooldown over (or the last probe never reported): this request is the probe
+                state, probe_until = HALF_OPEN, now + self.probe_timeout
+                print("🔌 Registrar circuit half-open; sending a probe request")
+            conn.execute("UPDATE circuit_breakers SET state = ?, probe_until = ?, tokens = ?, refilled_at = ? "
+                         "WHERE name = ?", (state, probe_until, tokens - 1, now, self.name))
+
+    def record_success(self):
+        with self._transaction() as conn:
+            row = self._row(conn)
+            if row['state'] != CLOSED:
+                print("🔌 Registrar circuit closed; requests resume")
+            if row['state'] != CLOSED or row['failures']:
+                conn.execute("UPDATE circuit_breakers SET state = ?, failures = 0, open_for = ?, probe_until = 0 "
+                             "WHERE name = ?", (CLOSED, self.cooldown, self.name))
+        REGISTRAR_REQUESTS_TOTAL.inc(outcome='success')
+
+    def record_failure(self):
+        now = time.time()
+        with self._transaction() as conn:
+            row = self._row(conn)
+            failures = row['failures'] + 1
+            if row['state'] == HALF_OPEN:
+                open_for = min(self.max_cooldown, row['open_for'] * 2)
+                self._open(conn, failures, now, open_for)
+            elif row['state'] == CLOSED and failures >= self.failure_threshold:
+                self._open(conn, failures, now, self.cooldown)
+            else:
+                conn.execute("UPDATE circuit_breakers SET failures = ? WHERE name = ?", (failures, self.name))
+        REGISTRAR_REQUESTS_TOTAL.inc(outcome='failure')
+
+    def _open(self, conn, failures, now, open_for):
+        conn.execute("UPDATE circuit_breakers SET state = ?, failures = ?, opened_at = ?, open_for = ?, "
+                     "probe_until = 0 WHERE name = ?", (OPEN, failures, now, open_for, self.name))
+        print(f"🔌 Registrar circuit open after {failures} failure(s); pausing requests for {open_for:.0f}s")
+
+    @contextmanager
+    def request(self):
+        """Guard one request: take a token first, then record whether the block raised"""
+        self.acquire()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+
+    def status(self):
+        """Breaker state and remaining request budget, for /health"""
+        now = time.time()
+        row = self._row(self._connection())
+        retry_in = 0.0
+        if row['state'] == OPEN:
+            retry_in = max(0.0, row['opened_at'] + row['open_for'] - now)
+        return {
+            'state': row['state'],
+            'consecutive_failures': row['failures'],
+            'retry_in': round(retry_in, 1),
+            'tokens': round(self._tokens(row, now), 2),
+            'burst': self.burst,
+            'max_requests_per_hour': round(self.rate * 3600),
+        }
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_registrar_guard():
+    """Process-wide RegistrarGuard on the shared database, configured from Config"""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = RegistrarGuard(
+                Config.DATABASE_PATH,
+                max_requests_per_hour=Config.REGISTRAR_MAX_REQUESTS_PER_HOUR,
+                burst=Config.REGISTRAR_BURST,
+                failure_threshold=Config.REGISTRAR_BREAKER_FAILURES,
+                cooldown=Config.REGISTRAR_BREAKER_COOLDOWN,
+                max_cooldown=Config.REGISTRAR_BREAKER_MAX_COOLDOWN,
+            )
+        return _guard
@@ -0,0 +1,110 @@
+def normalize_instructor(name):
+    """Case- and spacing-insensitive instructor key, e.g. "smith, john" """
+    return ' '.join((name or '').lower().split())
+
+
+def normalize_days(days):
+    return ''.join((days or '').upper().split())
+
+
+def normalize_time(time_slot):
+    return ''.join((time_slot or '').lower().split())
+
+
+def make_rule(data):
+    """Validate and normalize a watch rule from user input.
+
+    A rule watches one CRN, any section of a course (subject plus
+    course_number) or any section taught by an instructor. Any of those
+    plus `days` and `time` narrow it further, and it fires once some
+    matching section has at least `min_seats` open seats. Raises
+    ValueError if the rule has no scope or a bad seat threshold.
+    """
+    def text(key):
+        value = data.get(key)
+        return str(value).strip() if value not in (None, '') else ''
+
+    rule = {
+        'crn': text('crn') or None,
+        'subject': text('subject').upper() or None,
+        'course_number': text('course_number').upper() or None,
+        'instructor': normalize_instructor(text('instructor')) or None,
+        'days': normalize_days(text('days')) or None,
+        'time': normalize_time(text('time')) or None,
+    }
+    if bool(rule['subject']) != bool(rule['course_number']):
+        raise ValueError("subject and course_number go together")
+    if not (rule['crn'] or rule['subject'] or rule['instructor']):
+        raise ValueError("A rule needs a crn, a subject and course_number, or an instructor")
+    try:
+        min_seats = data.get('min_seats')
+        rule['min_seats'] = int(min_seats) if min_seats not in (None, '') else 1
+    except (TypeError, ValueError):
+        raise ValueError("min_seats must be a whole number")
+    if rule['min_seats'] < 1:
+        raise ValueError("min_seats must be at least 1")
+    return rule
+
+
+def rule_accepts(rule, crn, course):
+    """Whether a section satisfies every condition of a rule"""
+    return (course['available_seats'] >= rule['min_seats']
+            and (rule['crn'] is None or rule['crn'] == crn)
+            and (rule['subject'] is None or (rule['subject'] == course['subject']
+                                             and rule['course_number'] == course['course_number']))
+            and (rule['instructor'] is None or rule['instructor'] == normalize_instructor(course['instructor']))
+            and (rule['days'] is None or rule['days'] == normalize_days(course['days']))
+            and (rule['time'] is None or normalize_time(course['time']).startswith(rule['time'])))
+
+
+def describe_rule(rule):
+    """Short human description, e.g. "any section of ECO 201 taught by smith, john with at least 2 seats" """
+    parts = []
+    if rule['crn']:
+        parts.append(f"CRN {rule['crn']}")
+    if rule['subject']:
+        parts.append(f"any section of {rule['subject']} {rule['course_number']}")
+    if rule['instructor']:
+        parts.append(f"taught by {rule['instructor']}" if parts else f"any section taught by {rule['instructor']}")
+    if rule['days'] or rule['time']:
+        parts.append("on " + " ".join(filter(None, (rule['days'], rule['time']))))
+    if rule['min_seats'] > 1:
+        parts.append(f"with at least {rule['min_seats']} seats")
+    return " ".join(parts)
+
+
+class RuleIndex:
+    """In-memory lookup of rules by CRN, by course and by instructor.
+
+    Used to check a batch of rules (new ones, or all of them on a full
+    pass) against a snapshot in one scan: each section only looks at the
+    rules keyed on its own CRN, course or instructor.
+    """
+
+    def __init__(self, rules=()):
+        self._by_crn = {}
+        self._by_course = {}
+        self._by_instructor = {}
+        self._count = 0
+        for rule in rules:
+            self.add(rule)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, rule):
+        # Keyed on the most selective field the rule has; the others are checked by rule_accepts
+        if rule['crn']:
+            self._by_crn.setdefault(rule['crn'], []).append(rule)
+        elif rule['subject']:
+            self._by_course.setdefault((rule['subject'], rule['course_number']), []).append(rule)
+        else:
+            self._by_instructor.setdefault(rule['instructor'], []).append(rule)
+        self._count += 1
+
+    def matching(self, crn, course):
+        """Rules satisfied by one section"""
+        candidates = (self._by_crn.get(crn, []) +
+                      self._by_course.get((course['subject'], course['course_number']), []) +
+                      self._by_instructor.get(normalize_instructor(course['instructor']), []))
+        return [rule for rule in candidates if rule_accepts(rule, crn, course)]
@@ -0,0 +1,86 @@
+import threading
+import time
+from datetime import datetime
+
+
+def parse_windows(spec):
+    """Parse "start/end,start/end" ISO datetimes (e.g. REGISTRATION_WINDOWS) into (start, end) pairs"""
+    windows = []
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('/')
+        try:
+            windows.append((datetime.fromisoformat(start.strip()), datetime.fromisoformat(end.strip())))
+        except ValueError:
+            print(f"⚠️ Ignoring malformed registration window: {part}")
+    return windows
+
+
+class AdaptiveScheduler:
+    """Chooses the next poll interval from recent seat churn and registration windows.
+
+    Polls every `window_interval` seconds while a registration window is open.
+    Otherwise the interval shrinks from `base` toward `min_interval` as the
+    smoothed number of seat changes per poll rises, and grows toward
+    `max_interval` while consecutive polls see no changes. No interval is ever
+    shorter than the gap allowed by `max_requests_per_hour`.
+    """
+
+    def __init__(self, base=300, min_interval=60, max_interval=1800, window_interval=60,
+                 max_requests_per_hour=120, windows=(), smoothing=0.5, quiet_growth=1.5):
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window_interval = window_interval
+        self.min_gap = 3600 / max_requests_per_hour if max_requests_per_hour else 0
+        self.windows = list(windows)
+        self.smoothing = smoothing
+        self.quiet_growth = quiet_growth
+
+        self._lock = threading.Lock()
+        self._churn = 0.0
+        self._quiet_polls = 0
+        self._last = {'interval': base, 'reason': 'no polls yet'}
+
+    def record(self, seat_changes):
+        """Feed the number of seat changes seen by the latest poll"""
+        with self._lock:
+            self._churn = self.smoothing * seat_changes + (1 - self.smoothing) * self._churn
+            if self._churn < 0.05:
+                self._churn = 0.0
+            self._quiet_polls = 0 if seat_changes else self._quiet_polls + 1
+
+    def active_window(self, now=None):
+        now = now or datetime.now()
+        return next(((start, end) for start, end in self.windows if start <= now < end), None)
+
+    def next_interval(self, now=None):
+        """Seconds until the next poll, and why"""
+        with self._lock:
+            window = self.active_window(now)
+            if window:
+                interval = self.window_interval
+                reason = f"registration window open until {window[1].isoformat(timespec='minutes')}"
+            elif self._churn > 0:
+                interval = max(self.min_interval, self.base / (1 + self._churn))
+                reason = f"churn of {self._churn:.1f} seat changes per poll"
+            elif self._quiet_polls:
+                interval = min(self.max_interval, self.base * self.quiet_growth ** min(self._quiet_polls, 20))
+                reason = f"quiet for {self._quiet_polls} poll(s)"
+            else:
+                interval = self.base
+                reason = "default interval"
+
+            if interval < self.min_gap:
+                interval = self.min_gap
+                reason += " (raised to the registrar rate limit)"
+
+            self._last = {'interval': round(interval, 1), 'reason': reason, 'decided_at': time.time()}
+            return interval, reason
+
+    def status(self):
+        with self._lock:
+            return dict(self._last, churn=round(self._churn, 2), quiet_polls=self._quiet_polls,
+                        registration_window=self.active_window() is not None)
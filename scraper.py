@@ -1,127 +1,49 @@
+import hashlib
 import os
+import re
+import sys
 import time
 import traceback
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-from driver import setupDriver, safe_get_page
+from course_parser import parse_course_row, parse_course_table
+from metrics import ROWS_PARSED, SCRAPE_SECONDS, SCRAPES_TOTAL, TABLE_PARSE_SECONDS
+from registrar_guard import RegistrarUnavailable, get_registrar_guard
 
 # Constants
-URL = "https://connect.wofford.edu/myWofford/registrar/courseSchedule.aspx"
+URL = os.environ.get('SCRAPER_URL', "https://connect.wofford.edu/myWofford/registrar/courseSchedule.aspx")
 
-def scrapeCourses():
+# "http" fetches the page directly; "selenium" drives headless Chrome
+SCRAPER_BACKEND = os.environ.get('SCRAPER_BACKEND', 'http').lower()
+
+# Parts of the page that change on every load without the course table changing
+VOLATILE_MARKUP = re.compile(r'<input[^>]*type="hidden"[^>]*>|<script\b.*?</script>|\s+', re.I | re.S)
+
+# Digest of the last parsed page and its courses, per backend
+_last_page = {}
+
+def scrapeCourses(backend=None):
     """Scrape course data with robust error handling for Railway"""
-    driver = None
+    backend = (backend or SCRAPER_BACKEND).lower()
+    started = time.time()
     
     try:
-        print(f"🔍 Starting course scraping...")
+        print(f"🔍 Starting course scraping ({backend} backend)...")
         print(f"Environment: {os.environ.get('RAILWAY_ENVIRONMENT', 'Local')}")
         
-        # Initialize driver
-        driver = setupDriver()
-        print(f"✅ Driver initialized")
-        
-        # Load the page with retries
         print(f"📡 Loading course catalog: {URL}")
-        if not safe_get_page(driver, URL):
-            raise Exception("Failed to load course catalog after retries")
-        
-        print(f"✅ Course catalog loaded")
-        print(f"Page title: {driver.title}")
-        print(f"Current URL: {driver.current_url}")
-        
-        # Find all tables
-        print(f"🔍 Looking for course tables...")
-        tables = driver.find_elements(By.TAG_NAME, "table")
-        print(f"Found {len(tables)} table(s)")
-        
-        if not tables:
-            # Try alternative selectors
-            print("❌ No tables found with TAG_NAME. Trying CSS selectors...")
-            tables = driver.find_elements(By.CSS_SELECTOR, "table")
-            print(f"CSS selector found {len(tables)} table(s)")
-            
-        if not tables:
-            # Save page source for debugging
-            page_source = driver.page_source
-            print(f"❌ No tables found. Page source length: {len(page_source)}")
-            print(f"Page source preview: {page_source[:1000]}...")
-            raise Exception("No course tables found on the page")
-        
-        # Get the main table (usually the first or largest one)
-        main_table = tables[0]
-        if len(tables) > 1:
-            # Find the table with the most rows
-            main_table = max(tables, key=lambda t: len(t.find_elements(By.TAG_NAME, "tr")))
-        
-        # Find table rows (excluding headers)
-        all_rows = main_table.find_elements(By.TAG_NAME, "tr")
-        data_rows = all_rows[1:] if len(all_rows) > 1 else all_rows
-        
-        print(f"📊 Found {len(all_rows)} total rows, {len(data_rows)} data rows")
-        
-        if len(data_rows) == 0:
-            raise Exception("No data rows found in course table")
-        
-        # Dictionary to store course data
-        courseDict = {}
-        
-        for i, row in enumerate(data_rows):
-            try:
-                columns = row.find_elements(By.TAG_NAME, "td")
-                details = [col.text.strip() for col in columns]
-                
-                # Debug first few rows
-                if i < 3:
-                    print(f"Row {i}: {len(columns)} columns, first 5 values: {details[:5]}")
-                
-                if details and len(details) >= 12:  # Minimum required columns
-                    crn = details[0].strip()
-                    
-                    # Skip empty CRNs
-                    if not crn or not crn.replace('-', '').replace(' ', ''):
-                        continue
-                    
-                    # Extract course information with safe indexing
-                    subject = details[1] if len(details) > 1 else "N/A"
-                    course_number = details[2] if len(details) > 2 else "N/A"
-                    title = details[10] if len(details) > 10 else "N/A"
-                    days = details[13] if len(details) > 13 else "N/A"
-                    time_slot = details[14] if len(details) > 14 else "N/A"
-                    instructor = details[20] if len(details) > 20 else "N/A"
-                    
-                    # Handle available seats more carefully
-                    available_seats = 0
-                    if len(details) > 19:
-                        try:
-                            seats_text = details[19].strip()
-                            if seats_text.isdigit():
-                                available_seats = int(seats_text)
-                        except (ValueError, IndexError):
-                            available_seats = 0
-                    
-                    courseDict[crn] = {
-                        "subject": subject,
-                        "course_number": course_number,
-                        "title": title,
-                        "days": days,
-                        "time": time_slot,
-                        "instructor": instructor,
-                        "available_seats": available_seats
-                    }
-                    
-                    # Debug first few courses
-                    if i < 3:
-                        print(f"✅ Parsed course: CRN {crn}, {subject} {course_number}, {available_seats} seats")
-                
-            except Exception as row_error:
-                print(f"⚠️ Error parsing row {i}: {str(row_error)}")
-                continue
+        previous = _last_page.get(backend, (None, None))[1]
+        if backend == 'selenium':
+            courseDict = scrapeSelenium(URL)
+        else:
+            from http_fetcher import fetch_catalog_html
+            courseDict = fetch_catalog_html(URL, parse=lambda html: parseIfChanged(html, backend))
+        
+        if courseDict is not None and courseDict is previous:
+            # Same page as last time: hand back the same dict so callers can skip diffing too
+            SCRAPE_SECONDS.observe(time.time() - started, backend=backend)
+            SCRAPES_TOTAL.inc(backend=backend, result='unchanged')
+            print(f"♻️ Course catalog unchanged; reusing {len(courseDict)} parsed courses")
+            return courseDict
         
         print(f"🎉 Successfully scraped {len(courseDict)} courses")
         
@@ -133,29 +55,137 @@ def scrapeCourses():
                 course = courseDict[crn]
                 print(f"   {crn}: {course['subject']} {course['course_number']} - {course['available_seats']} seats")
         
+        SCRAPE_SECONDS.observe(time.time() - started, backend=backend)
+        SCRAPES_TOTAL.inc(backend=backend, result='success' if courseDict else 'empty')
         return courseDict
         
+    except RegistrarUnavailable as e:
+        # Failing fast is the point; no traceback, and the cache keeps serving the last catalog
+        print(f"⏸️ Skipped scraping: {str(e)}")
+        SCRAPES_TOTAL.inc(backend=backend, result='skipped')
+        return {}
+        
     except Exception as e:
         error_msg = f"❌ Scraping failed: {str(e)}"
         print(error_msg)
         print(f"Full traceback: {traceback.format_exc()}")
+        SCRAPES_TOTAL.inc(backend=backend, result='failure')
         
-        # Try to save screenshot for debugging
-        if driver:
+        # Return empty dict instead of raising exception
+        return {}
+
+def pageDigest(page_source):
+    """Hash of the page with viewstate, scripts and whitespace removed"""
+    normalized = VOLATILE_MARKUP.sub('', page_source)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+def parseIfChanged(page_source, backend):
+    """Parse the page unless it matches the last one parsed for this backend.
+
+    An unchanged page (same digest, or None for an HTTP 304) returns the
+    previously parsed dict itself, without parsing.
+    """
+    digest, courseDict = _last_page.get(backend, (None, None))
+    if page_source is None:
+        if courseDict is None:
+            raise Exception("Catalog not modified, but no earlier scrape to reuse")
+        return courseDict
+    new_digest = pageDigest(page_source)
+    if new_digest == digest:
+        return courseDict
+    courseDict = parseCatalogPage(page_source)
+    if courseDict:
+        _last_page[backend] = (new_digest, courseDict)
+    return courseDict
+
+def parseCatalogPage(page_source):
+    """Parse the whole catalog page locally in a single pass"""
+    parse_started = time.time()
+    try:
+        courseDict = parse_course_table(page_source)
+    except ValueError:
+        print(f"❌ Could not parse course table. Page source length: {len(page_source)}")
+        print(f"Page source preview: {page_source[:1000]}...")
+        raise
+    parse_seconds = time.time() - parse_started
+    TABLE_PARSE_SECONDS.observe(parse_seconds)
+    ROWS_PARSED.observe(len(courseDict))
+    print(f"⏱️ Parsed course table in {parse_seconds:.3f}s")
+    return courseDict
+
+def scrapeSelenium(url):
+    """Load the catalog in a pooled headless Chrome and parse its page source"""
+    # Selenium is only imported when this backend is actually used
+    from driver import get_driver_pool, safe_get_page
+    
+    # Don't start or borrow a browser while the registrar is refusing requests
+    guard = get_registrar_guard()
+    guard.check()
+    
+    with get_driver_pool().driver() as driver:
+        try:
+            # Load, wait for the table and parse, with retries
+            report = safe_get_page(driver, url, parse=lambda html: parseIfChanged(html, 'selenium'), guard=guard)
+            if not report:
+                raise Exception("Failed to load course catalog after retries")
+            
+            print(f"✅ Course catalog loaded")
+            print(f"Page title: {driver.title}")
+            print(f"Current URL: {driver.current_url}")
+            return report['result']
+            
+        except RegistrarUnavailable:
+            raise
+        except Exception:
+            # Try to save screenshot for debugging
             try:
                 driver.save_screenshot("/tmp/scraper_error.png")
                 print("📸 Error screenshot saved")
             except:
                 pass
-        
-        # Return empty dict instead of raising exception
-        return {}
-        
-    finally:
-        # Always clean up
-        if driver:
-            try:
-                driver.quit()
-                print("✅ Driver closed")
-            except:
-                pass
\ No newline at end of file
+            raise
+
+def closeScrapers():
+    """Quit pooled browsers and close the HTTP session, if this process ever created them"""
+    driver = sys.modules.get('driver')
+    if driver is not None:
+        driver.close_driver_pool()
+    http_fetcher = sys.modules.get('http_fetcher')
+    if http_fetcher is not None:
+        http_fetcher.close_session()
+
+def scrapeTableElements(driver):
+    """Legacy parser that reads every row and cell through WebDriver calls.
+
+    Kept as the baseline for benchmarks/bench_parse.py; scrapeCourses uses
+    parse_course_table on a single page_source snapshot instead.
+    """
+    from selenium.webdriver.common.by import By
+    
+    tables = driver.find_elements(By.TAG_NAME, "table")
+    if not tables:
+        raise Exception("No course tables found on the page")
+    
+    # Get the main table (usually the first or largest one)
+    main_table = tables[0]
+    if len(tables) > 1:
+        # Find the table with the most rows
+        main_table = max(tables, key=lambda t: len(t.find_elements(By.TAG_NAME, "tr")))
+    
+    # Find table rows (excluding headers)
+    all_rows = main_table.find_elements(By.TAG_NAME, "tr")
+    data_rows = all_rows[1:] if len(all_rows) > 1 else all_rows
+    
+    courseDict = {}
+    for i, row in enumerate(data_rows):
+        try:
+            columns = row.find_elements(By.TAG_NAME, "td")
+            parsed = parse_course_row([col.text.strip() for col in columns])
+            if parsed:
+                crn, course = parsed
+                courseDict[crn] = course
+        except Exception as row_error:
+            print(f"⚠️ Error parsing row {i}: {str(row_error)}")
+            continue
+    
+    return courseDict
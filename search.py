@@ -0,0 +1,160 @@
+import bisect
+import re
+import threading
+
+# Rank of each kind of key; lower kinds are listed first
+CRN, CODE, WORD = 0, 1, 2
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def _normalize(text):
+    return ''.join(_TOKEN.findall(text.lower()))
+
+
+def _course_keys(crn, course):
+    """(kind, key) pairs a section can be found by"""
+    keys = {(CRN, crn), (CODE, _normalize(f"{course['subject']}{course['course_number']}"))}
+    keys.update((WORD, word) for word in _TOKEN.findall(course['title'].lower()))
+    keys.update((WORD, word) for word in _TOKEN.findall(course['instructor'].lower()) if len(word) > 1)
+    return keys
+
+
+def scan_sections(courses, subject, course_number):
+    """CRNs of every section of one course, found by scanning a course mapping instead of an index"""
+    code = _normalize(f"{subject}{course_number}")
+    return sorted(crn for crn, course in courses.items()
+                  if _normalize(f"{course['subject']}{course['course_number']}") == code)
+
+
+class SearchIndex:
+    """In-memory prefix index over CRNs, course codes ("MATH 101") and title words.
+
+    Keys are kept in one sorted list per kind, so a prefix lookup is a
+    bisect plus a short scan, and CRN matches come before course codes,
+    which come before title words. The index follows the CatalogCache: it
+    is built from the first snapshot and then patched from each change set
+    instead of rebuilt.
+    """
+
+    def __init__(self):
+        self._keys = {CRN: [], CODE: [], WORD: []}  # kind -> sorted [(key, crn)]
+        self._sections = {}  # crn -> (course, keys)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    def __len__(self):
+        return len(self._sections)
+
+    def build(self, snapshot):
+        """Index every section of a snapshot from scratch"""
+        keys = {CRN: [], CODE: [], WORD: []}
+        sections = {}
+        for crn, course in snapshot.courses.items():
+            course_keys = _course_keys(crn, course)
+            sections[crn] = (course, course_keys)
+            for kind, key in course_keys:
+                keys[kind].append((key, crn))
+        for entries in keys.values():
+            entries.sort()
+        with self._lock:
+            self._keys, self._sections, self._version = keys, sections, snapshot.version
+        print(f"🔎 Indexed {len(sections)} sections for search (v{snapshot.version})")
+
+    def update(self, snapshot, changes):
+        """Apply one published change set; rebuild if versions were skipped"""
+        if not self._sections or snapshot.version != self._version + 1:
+            self.build(snapshot)
+            return
+
+        with self._lock:
+            for change in changes:
+                crn = change['crn']
+                if change['kind'] in ('section_added', 'section_removed', 'details_changed'):
+                    self._remove(crn)
+                    course = snapshot.get(crn)
+                    if course is not None:
+                        self._add(crn, course)
+                elif crn in self._sections:
+                    # Seat counts only; keys are unchanged
+                    self._sections[crn] = (snapshot.get(crn), self._sections[crn][1])
+            self._version = snapshot.version
+
+    def _add(self, crn, course):
+        course_keys = _course_keys(crn, course)
+        self._sections[crn] = (course, course_keys)
+        for kind, key in course_keys:
+            bisect.insort(self._keys[kind], (key, crn))
+
+    def _remove(self, crn):
+        section = self._sections.pop(crn, None)
+        if section is None:
+            return
+        for kind, key in section[1]:
+            entries = self._keys[kind]
+            i = bisect.bisect_left(entries, (key, crn))
+            if i < len(entries) and entries[i] == (key, crn):
+                del entries[i]
+
+    def sections(self, subject, course_number):
+        """CRNs of every section of one course, e.g. ("ECO", "201")"""
+        code = _normalize(f"{subject}{course_number}")
+        with self._lock:
+            crns = []
+            for crn in self._prefix(CODE, code):
+                course = self._sections[crn][0]
+                if _normalize(f"{course['subject']}{course['course_number']}") == code:
+                    crns.append(crn)
+            return crns
+
+    def _prefix(self, kind, prefix):
+        """CRNs with a key of `kind` starting with `prefix`, in key order"""
+        entries = self._keys[kind]
+        i = bisect.bisect_left(entries, (prefix,))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i][1]
+            i += 1
+
+    def search(self, query, limit=10):
+        """Top `limit` (crn, course) matches for a CRN, course code or title words"""
+        tokens = _TOKEN.findall(query.lower())
+        if not tokens or limit <= 0:
+            return []
+
+        with self._lock:
+            found = []
+            seen = set()
+            # The whole query may be a CRN or a course code typed with a space ("math 1")
+            lookups = [(CRN, ''.join(tokens)), (CODE, ''.join(tokens))]
+            if len(tokens) == 1:
+                lookups.append((WORD, tokens[0]))
+            for kind, prefix in lookups:
+                for crn in self._prefix(kind, prefix):
+                    if crn not in seen:
+                        seen.add(crn)
+                        found.append(crn)
+                        if len(found) >= limit:
+                            return [(crn, self._sections[crn][0]) for crn in found]
+
+            if len(tokens) > 1:
+                # Every token must prefix one of the section's keys; scan the most selective one
+                i = max(range(len(tokens)), key=lambda i: len(tokens[i]))
+                rarest, others = tokens[i], tokens[:i] + tokens[i + 1:]
+                for kind in (CODE, WORD):
+                    for crn in self._prefix(kind, rarest):
+                        if crn in seen:
+                            continue
+                        words = [key for _, key in self._sections[crn][1]]
+                        if all(any(word.startswith(token) for word in words) for token in others):
+                            seen.add(crn)
+                            found.append(crn)
+                            if len(found) >= limit:
+                                break
+                    if len(found) >= limit:
+                        break
+
+            return [(crn, self._sections[crn][0]) for crn in found[:limit]]
@@ -0,0 +1,589 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from catalog import CatalogSnapshot
+from rules import normalize_instructor
+
+
+class _SQLiteStore:
+    """Per-thread WAL connections to the shared database file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread; SQLite connections are not shareable by default
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def checkpoint(self):
+        """Fold the write-ahead log back into the database file"""
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SubscriptionStore(_SQLiteStore):
+    """Transactional SQLite store of subscriptions.
+
+    Runs in WAL mode so readers never block the writer, and every write is a
+    single-row transaction, so its cost does not grow with the number of
+    subscriptions. Lookups go through the unique (crn, email) index, which
+    also serves per-CRN queries as its leading column; an (email, id) index
+    serves the per-student status filter. Every write bumps a revision
+    counter in the same transaction, so caches of rendered status pages
+    can tell, in any process, whether the subscriptions changed.
+    """
+
+    COLUMNS = ('name', 'email', 'phone', 'crn', 'timestamp', 'course_info')
+
+    def __init__(self, path="openseat.db", legacy_json=None):
+        super().__init__(path)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    crn TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    phone TEXT,
+                    timestamp TEXT,
+                    course_info TEXT
+                )
+            """)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_subscriptions_crn_email ON subscriptions (crn, email)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_email ON subscriptions (email, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if legacy_json:
+            self._migrate_json(legacy_json)
+
+    def _migrate_json(self, path):
+        """Import user_requests.json once; later starts leave the file alone"""
+        if not os.path.exists(path):
+            return
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return
+            try:
+                with open(path, 'r') as f:
+                    legacy = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                legacy = []
+            imported = 0
+            for user_data in legacy:
+                imported += self._insert(conn, user_data)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (path,))
+            self._bump(conn)
+        print(f"📦 Migrated {imported} request(s) from {path} to {self.path}")
+
+    def _insert(self, conn, user_data):
+        course_info = user_data.get('course_info')
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO subscriptions (crn, email, name, phone, timestamp, course_info) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (user_data['crn'], user_data['email'], user_data.get('name', ''), user_data.get('phone', ''),
+             user_data.get('timestamp') or datetime.now().isoformat(), json.dumps(course_info) if course_info is not None else None),
+        )
+        return cursor.rowcount
+
+    def _bump(self, conn):
+        conn.execute("INSERT INTO meta (key, value) VALUES ('revision', 1) "
+                     "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def revision(self):
+        """Counter bumped by every add and remove, in whichever process made it"""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _rows(self, sql, params=()):
+        rows = self._connection().execute(
+            f"SELECT name, email, phone, crn, timestamp, course_info FROM subscriptions {sql}", params
+        ).fetchall()
+        subscriptions = []
+        for row in rows:
+            user_data = dict(zip(self.COLUMNS, row))
+            user_data['course_info'] = json.loads(row[5]) if row[5] else {}
+            subscriptions.append(user_data)
+        return subscriptions
+
+    def add(self, user_data):
+        """Add a subscription. Returns False if this email already watches the CRN."""
+        with self._transaction() as conn:
+            added = self._insert(conn, user_data) == 1
+            if added:
+                self._bump(conn)
+            return added
+
+    def add_many(self, subscriptions):
+        """Add several subscriptions in one transaction; returns whether each one was new"""
+        with self._transaction() as conn:
+            added = [self._insert(conn, user_data) == 1 for user_data in subscriptions]
+            if any(added):
+                self._bump(conn)
+            return added
+
+    def remove(self, crn, email):
+        """Remove and return a subscription, or None if it did not exist"""
+        with self._transaction() as conn:
+            user_data = self.get(crn, email)
+            if user_data:
+                conn.execute("DELETE FROM subscriptions WHERE crn = ? AND email = ?", (crn, email))
+                self._bump(conn)
+            return user_data
+
+    def get(self, crn, email):
+        rows = self._rows("WHERE crn = ? AND email = ?", (crn, email))
+        return rows[0] if rows else None
+
+    def subscribers(self, crn):
+        """Every subscription for one CRN"""
+        return self._rows("WHERE crn = ? ORDER BY id", (crn,))
+
+    def crns(self):
+        """CRNs with at least one subscriber"""
+        rows = self._connection().execute("SELECT DISTINCT crn FROM subscriptions ORDER BY crn").fetchall()
+        return [row[0] for row in rows]
+
+    def all(self):
+        return self._rows("ORDER BY id")
+
+    def added_since(self, after_id):
+        """CRNs subscribed after row id `after_id`, and the newest row id.
+
+        Lets a poller in another process notice new subscriptions without
+        being told about them directly.
+        """
+        rows = self._connection().execute(
+            "SELECT id, crn FROM subscriptions WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+        if not rows:
+            return set(), after_id
+        return {row[1] for row in rows}, rows[-1][0]
+
+    def last_id(self):
+        return self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM subscriptions").fetchone()[0]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+
+    @staticmethod
+    def _where(crns=None, email=None):
+        """WHERE clause for the status filters; each one is served by an index"""
+        clauses, params = [], []
+        if crns is not None:
+            clauses.append(f"crn IN ({', '.join('?' * len(crns))})" if crns else "0")
+            params.extend(crns)
+        if email:
+            clauses.append("email = ?")
+            params.append(email)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def page(self, limit, offset=0, crns=None, email=None):
+        """One page of subscriptions in subscription order, optionally only some CRNs or one email"""
+        where, params = self._where(crns, email)
+        return self._rows(f"{where} ORDER BY id LIMIT ? OFFSET ?", params + [limit, offset])
+
+    def count(self, crns=None, email=None):
+        """Number of subscriptions matching the same filters as page()"""
+        where, params = self._where(crns, email)
+        return self._connection().execute(f"SELECT COUNT(*) FROM subscriptions {where}", params).fetchone()[0]
+
+    def crn_count(self):
+        """Number of CRNs with at least one subscriber, counted from the (crn, email) index"""
+        return self._connection().execute("SELECT COUNT(DISTINCT crn) FROM subscriptions").fetchone()[0]
+
+
+class WatchRuleStore(_SQLiteStore):
+    """Watch rules: a CRN, any section of a course or any section by an instructor, with conditions.
+
+    Rules are indexed by CRN, by (subject, course_number) and by
+    instructor, so the sections changed by a snapshot each find their
+    candidate rules with a few index lookups however many rules exist.
+    Like subscriptions, a rule is dropped once it has been notified.
+    """
+
+    COLUMNS = ('rule_id', 'name', 'email', 'phone', 'crn', 'subject', 'course_number', 'instructor',
+               'days', 'time', 'min_seats', 'timestamp')
+    RULE_FIELDS = ('crn', 'subject', 'course_number', 'instructor', 'days', 'time', 'min_seats')
+
+    def __init__(self, path="openseat.db"):
+        super().__init__(path)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS watch_rules (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    phone TEXT,
+                    crn TEXT,
+                    subject TEXT,
+                    course_number TEXT,
+                    instructor TEXT,
+                    days TEXT,
+                    time TEXT,
+                    min_seats INTEGER NOT NULL DEFAULT 1,
+                    timestamp TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_watch_rules_crn ON watch_rules (crn)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_watch_rules_course ON watch_rules (subject, course_number)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_watch_rules_instructor ON watch_rules (instructor)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_watch_rules_email ON watch_rules (email)")
+
+    def _rows(self, sql, params=()):
+        rows = self._connection().execute(
+            "SELECT id, name, email, phone, crn, subject, course_number, instructor, days, time, min_seats, "
+            f"timestamp FROM watch_rules {sql}", params
+        ).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def add(self, user_data, rule):
+        """Add a rule (as returned by rules.make_rule) for a user. Returns its id, or None if they already have it."""
+        fields = [rule[field] for field in self.RULE_FIELDS]
+        with self._transaction() as conn:
+            # Columns may be NULL, so compare with IS rather than a unique index
+            match = " AND ".join(f"{field} IS ?" for field in self.RULE_FIELDS)
+            if conn.execute(f"SELECT 1 FROM watch_rules WHERE email = ? AND {match}",
+                            [user_data['email']] + fields).fetchone():
+                return None
+            cursor = conn.execute(
+                "INSERT INTO watch_rules (name, email, phone, crn, subject, course_number, instructor, days, time, "
+                "min_seats, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [user_data.get('name', ''), user_data['email'], user_data.get('phone', '')] + fields +
+                [user_data.get('timestamp') or datetime.now().isoformat()],
+            )
+            return cursor.lastrowid
+
+    def remove(self, rule_id, email=None):
+        """Remove and return a rule (only if it belongs to `email`, when given), or None"""
+        with self._transaction() as conn:
+            rule = self.get(rule_id)
+            if rule is None or (email is not None and rule['email'] != email):
+                return None
+            conn.execute("DELETE FROM watch_rules WHERE id = ?", (rule_id,))
+            return rule
+
+    def get(self, rule_id):
+        rows = self._rows("WHERE id = ?", (rule_id,))
+        return rows[0] if rows else None
+
+    def for_email(self, email):
+        return self._rows("WHERE email = ? ORDER BY id", (email,))
+
+    def all(self):
+        return self._rows("ORDER BY id")
+
+    def candidates(self, crn, course):
+        """Rules keyed on this section's CRN, course or instructor; check each with rules.rule_accepts"""
+        return self._rows("WHERE crn = ? OR (subject = ? AND course_number = ?) OR instructor = ? ORDER BY id",
+                          (crn, course['subject'], course['course_number'], normalize_instructor(course['instructor'])))
+
+    def added_since(self, after_id):
+        """Rules added after row id `after_id`, and the newest row id"""
+        rules = self._rows("WHERE id > ? ORDER BY id", (after_id,))
+        return rules, (rules[-1]['rule_id'] if rules else after_id)
+
+    def last_id(self):
+        return self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM watch_rules").fetchone()[0]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM watch_rules").fetchone()[0]
+
+
+class SnapshotStore(_SQLiteStore):
+    """Recent catalog snapshots shared between processes.
+
+    Versions come from this table, so every process sees the same numbering
+    no matter which one scraped the catalog.
+    """
+
+    def __init__(self, path="openseat.db", keep=20):
+        super().__init__(path)
+        self.keep = keep
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS catalog_snapshots (
+                    version INTEGER PRIMARY KEY,
+                    fetched_at REAL NOT NULL,
+                    courses TEXT NOT NULL
+                )
+            """)
+
+    def save(self, courses, fetched_at=None, previous=None):
+        """Store a freshly scraped catalog under the next version and return it as a snapshot"""
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        payload = json.dumps(courses, separators=(',', ':'), default=dict)
+        with self._transaction() as conn:
+            version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM catalog_snapshots").fetchone()[0]
+            conn.execute("INSERT INTO catalog_snapshots (version, fetched_at, courses) VALUES (?, ?, ?)",
+                         (version, fetched_at, payload))
+            conn.execute("DELETE FROM catalog_snapshots WHERE version <= ?", (version - self.keep,))
+        return CatalogSnapshot(courses, version, fetched_at, previous=previous)
+
+    def head(self):
+        """(version, fetched_at) of the newest stored snapshot, or None"""
+        return self._connection().execute(
+            "SELECT version, fetched_at FROM catalog_snapshots ORDER BY version DESC LIMIT 1").fetchone()
+
+    def touch(self, version, fetched_at=None):
+        """Record that snapshot `version` was confirmed unchanged at `fetched_at`"""
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE catalog_snapshots SET fetched_at = MAX(fetched_at, ?) WHERE version = ?",
+                         (fetched_at, version))
+        return fetched_at
+
+    def latest(self, newer_than=0, previous=None):
+        """Newest stored snapshot, or None if there is none newer than `newer_than`.
+
+        Unchanged sections share their records with `previous` when it is given.
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT version, fetched_at FROM catalog_snapshots ORDER BY version DESC LIMIT 1").fetchone()
+        if row is None or row[0] <= newer_than:
+            return None
+        payload = conn.execute("SELECT courses FROM catalog_snapshots WHERE version = ?", (row[0],)).fetchone()
+        if payload is None:
+            return None
+        return CatalogSnapshot(json.loads(payload[0]), row[0], row[1], previous=previous)
+
+
+class SeatHistory(_SQLiteStore):
+    """Run-length encoded history of available seats per CRN.
+
+    A row is written only when a section's seat count changes: each run
+    holds one seat count from `started_at` until `ended_at` (NULL while it
+    is still current), so a term of five-minute polls costs a few rows per
+    section instead of one per poll.
+    """
+
+    def __init__(self, path="openseat.db"):
+        super().__init__(path)
+        self._current = None  # crn -> seats of the open runs, loaded on first record
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS seat_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    crn TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    seats INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    ended_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_seat_runs_crn ON seat_runs (crn, started_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_seat_runs_subject ON seat_runs (subject, started_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_seat_runs_open ON seat_runs (ended_at) WHERE ended_at IS NULL")
+
+    def record(self, snapshot):
+        """Close and open runs for every section whose seats differ from its current run.
+
+        Compares against the open runs themselves rather than a change set,
+        so skipped versions or a new leader process never leave gaps.
+        """
+        conn = self._connection()
+        if self._current is None:
+            self._current = dict(conn.execute("SELECT crn, seats FROM seat_runs WHERE ended_at IS NULL").fetchall())
+        current = self._current
+        at = snapshot.fetched_at
+
+        changed = [(crn, course) for crn, course in snapshot.courses.items()
+                   if current.get(crn) != course['available_seats']]
+        removed = [crn for crn in current if crn not in snapshot]
+        if not changed and not removed:
+            return 0
+
+        with self._transaction() as conn:
+            conn.executemany("UPDATE seat_runs SET ended_at = ? WHERE crn = ? AND ended_at IS NULL",
+                             [(at, crn) for crn in removed] + [(at, crn) for crn, _ in changed if crn in current])
+            conn.executemany("INSERT INTO seat_runs (crn, subject, seats, started_at) VALUES (?, ?, ?, ?)",
+                             [(crn, course['subject'], course['available_seats'], at) for crn, course in changed])
+        for crn in removed:
+            del current[crn]
+        current.update((crn, course['available_seats']) for crn, course in changed)
+        return len(changed) + len(removed)
+
+    def reset(self):
+        """Reload the open runs from the database on the next record (another process may have written)"""
+        self._current = None
+
+    def runs(self, crn, since=0, until=None):
+        """(seats, started_at, ended_at) runs of one CRN overlapping [since, until]"""
+        until = until if until is not None else time.time()
+        return self._connection().execute(
+            "SELECT seats, started_at, ended_at FROM seat_runs "
+            "WHERE crn = ? AND started_at <= ? AND (ended_at IS NULL OR ended_at > ?) ORDER BY started_at",
+            (crn, until, since)).fetchall()
+
+    def subject_runs(self, subject, since=0, until=None):
+        """{crn: runs} for every section of a subject overlapping [since, until]"""
+        until = until if until is not None else time.time()
+        rows = self._connection().execute(
+            "SELECT crn, seats, started_at, ended_at FROM seat_runs "
+            "WHERE subject = ? AND started_at <= ? AND (ended_at IS NULL OR ended_at > ?) ORDER BY crn, started_at",
+            (subject, until, since)).fetchall()
+        runs = {}
+        for crn, seats, started_at, ended_at in rows:
+            runs.setdefault(crn, []).append((seats, started_at, ended_at))
+        return runs
+
+
+def seat_openings(runs, since=0, until=None):
+    """Summarize runs into how often seats opened, at what hours, and for how long.
+
+    An opening is a run with seats after a run without; consecutive runs
+    with seats (e.g. 2 then 1) count as one opening lasting until the
+    section is full again.
+    """
+    until = until if until is not None else time.time()
+    openings = []  # (opened_at, closed_at or None)
+    previous_seats = None
+    for seats, started_at, ended_at in runs:
+        if seats > 0 and (previous_seats is None or previous_seats <= 0):
+            # The first run only counts if it started inside the range with the section full before
+            if previous_seats is not None:
+                openings.append([started_at, None])
+        elif seats <= 0 and openings and openings[-1][1] is None:
+            openings[-1][1] = started_at
+        previous_seats = seats
+
+    durations = sorted((closed_at or until) - opened_at for opened_at, closed_at in openings)
+    by_hour = [0] * 24
+    for opened_at, _ in openings:
+        by_hour[time.localtime(opened_at).tm_hour] += 1
+    open_seconds = sum(max(0.0, min(ended_at or until, until) - max(started_at, since))
+                       for seats, started_at, ended_at in runs if seats > 0)
+    return {
+        'openings': len(openings),
+        'openings_by_hour': by_hour,
+        'median_open_seconds': round(durations[len(durations) // 2], 1) if durations else None,
+        'max_open_seconds': round(durations[-1], 1) if durations else None,
+        'open_now': bool(runs) and runs[-1][0] > 0 and runs[-1][2] is None,
+        'open_seconds': round(open_seconds, 1),
+    }
+
+
+class ProcessStatusStore(_SQLiteStore):
+    """Latest metrics and poll schedule published by each process.
+
+    The poller, SMTP workers and their counters live in whichever process
+    holds the lease, so each process publishes what it has here and any
+    web worker can report every live process from /metrics and /health.
+    """
+
+    def __init__(self, path="openseat.db"):
+        super().__init__(path)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS process_status (
+                    process TEXT PRIMARY KEY,
+                    metrics TEXT NOT NULL,
+                    poll_schedule TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def publish(self, process, metrics, poll_schedule=None, max_age=None):
+        """Replace this process's row; with `max_age`, also drop rows of processes that stopped publishing"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO process_status (process, metrics, poll_schedule, updated_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (process, json.dumps(metrics), json.dumps(poll_schedule) if poll_schedule else None, now))
+            if max_age is not None:
+                conn.execute("DELETE FROM process_status WHERE updated_at < ?", (now - max_age,))
+
+    def remove(self, process):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM process_status WHERE process = ?", (process,))
+
+    def metrics(self, max_age):
+        """{process: published metrics} for processes that published in the last `max_age` seconds"""
+        rows = self._connection().execute(
+            "SELECT process, metrics FROM process_status WHERE updated_at >= ?", (time.time() - max_age,)).fetchall()
+        return {process: json.loads(metrics) for process, metrics in rows}
+
+    def poll_schedule(self, process):
+        row = self._connection().execute(
+            "SELECT poll_schedule FROM process_status WHERE process = ?", (process,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+
+class LeaderLease(_SQLiteStore):
+    """Time-limited lease in SQLite so only one process at a time runs a job.
+
+    The holder must renew the lease before `ttl` seconds pass; once it
+    expires any other process may take it over.
+    """
+
+    def __init__(self, path="openseat.db", name="catalog-poller", ttl=60):
+        super().__init__(path)
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def acquire(self):
+        """Take or renew the lease. Returns True while this process holds it."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            if row is not None and row[0] != self.holder and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                         (self.name, self.holder, now + self.ttl))
+            return True
+
+    def release(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+    def current(self):
+        """(holder, expires_at) of the live lease, or None if nobody holds it"""
+        row = self._connection().execute(
+            "SELECT holder, expires_at FROM leases WHERE name = ? AND expires_at > ?", (self.name, time.time())
+        ).fetchone()
+        return row
+
+    def held(self):
+        lease = self.current()
+        return lease is not None and lease[0] == self.holder
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
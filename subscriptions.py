@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class NotificationFanout:
+    """Notifies every subscriber of a CRN in parallel with bounded concurrency.
+
+    Each hand-off records its latency from the moment the open seat was
+    detected, and a subscriber is never notified twice while a hand-off to
+    them is still in flight.
+    """
+
+    def __init__(self, notify, max_workers=8, history=500):
+        self._notify = notify
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="notify")
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._deliveries = deque(maxlen=history)
+
+    def dispatch(self, crn, course_info, subscribers, detected_at=None):
+        """Queue one notification per subscriber. Returns the number queued."""
+        detected_at = detected_at if detected_at is not None else time.time()
+        queued = 0
+        for user_data in subscribers:
+            # A watch rule may match several sections; it is still notified only once
+            key = ('rule', user_data['rule_id']) if 'rule_id' in user_data else (crn, user_data['email'])
+            with self._lock:
+                if key in self._inflight:
+                    continue
+                self._inflight.add(key)
+            self._executor.submit(self._deliver, key, crn, course_info, user_data, detected_at)
+            queued += 1
+        if queued:
+            print(f"📣 Notifying {queued} subscriber(s) of CRN {crn}")
+        return queued
+
+    def _deliver(self, key, crn, course_info, user_data, detected_at):
+        try:
+            self._notify(crn, course_info, user_data, detected_at)
+            latency = time.time() - detected_at
+            self._deliveries.append({'crn': crn, 'email': user_data['email'], 'latency': latency})
+            print(f"⏱️ Handed off CRN {crn} alert for {user_data['email']} {latency:.2f}s after detection")
+        except Exception as e:
+            print(f"Error notifying {user_data['email']} for CRN {crn}: {str(e)}")
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def pending(self):
+        with self._lock:
+            return len(self._inflight)
+
+    def latency_summary(self):
+        """Count, median and max hand-off latency over recent notifications"""
+        latencies = sorted(delivery['latency'] for delivery in list(self._deliveries))
+        if not latencies:
+            return {'count': 0, 'p50_seconds': None, 'max_seconds': None}
+        return {
+            'count': len(latencies),
+            'p50_seconds': round(latencies[len(latencies) // 2], 3),
+            'max_seconds': round(latencies[-1], 3),
+        }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,47 @@
+"""CatalogCache freshness, with and without a poller keeping it fresh"""
+
+import time
+import unittest
+
+from catalog import CatalogCache, Course
+
+
+class CatalogCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scrapes = 0
+        self.cache = CatalogCache(self.scrape, ttl=300, max_stale=3600)
+        self.cache.publish({"1": Course("ECO", "201", "Economics", "MWF", "9", "Smith, J", 0)},
+                           fetched_at=time.time() - 400)
+
+    def scrape(self):
+        self.scrapes += 1
+        return {"1": Course("ECO", "201", "Economics", "MWF", "9", "Smith, J", self.scrapes)}
+
+    def wait_for_version(self, version, timeout=5):
+        deadline = time.time() + timeout
+        while self.cache.snapshot.version < version:
+            if time.time() > deadline:
+                self.fail("timed out")
+            time.sleep(0.01)
+
+    def test_stale_read_revalidates(self):
+        self.assertEqual(self.cache.get().version, 1)  # Served stale while it revalidates
+        self.wait_for_version(2)
+        self.assertEqual(self.scrapes, 1)
+
+    def test_reads_leave_scraping_to_the_poller(self):
+        self.cache.poll_interval = 1000
+        for _ in range(3):
+            self.assertEqual(self.cache.get().version, 1)
+        self.assertEqual(self.scrapes, 0)
+
+    def test_reads_scrape_once_the_poller_is_a_ttl_late(self):
+        self.cache.poll_interval = 60
+        self.cache.get()
+        self.wait_for_version(2)
+        self.assertEqual(self.scrapes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
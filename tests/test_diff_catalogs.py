@@ -0,0 +1,87 @@
+"""diff_catalogs change sets and the ChangeFeed history"""
+
+import unittest
+
+from catalog import ChangeFeed, Course, diff_catalogs
+
+
+def course(seats, **details):
+    fields = dict(subject="ECO", course_number="201", title="Principles of Economics", days="MWF",
+                  time="09:00 am-09:50 am", instructor="Smith, J", available_seats=seats)
+    fields.update(details)
+    return Course(**fields)
+
+
+class DiffCatalogsTest(unittest.TestCase):
+
+    def kinds(self, old, new):
+        return {(change['crn'], change['kind']) for change in diff_catalogs(old, new)}
+
+    def test_no_changes(self):
+        shared = course(3)
+        self.assertEqual(diff_catalogs({"1": shared}, {"1": shared}), [])
+        self.assertEqual(diff_catalogs({"1": course(3)}, {"1": course(3)}), [])
+
+    def test_seat_transitions(self):
+        old = {"1": course(0), "2": course(2), "3": course(2)}
+        new = {"1": course(1), "2": course(0), "3": course(5)}
+        self.assertEqual(diff_catalogs(old, new), [
+            {'crn': "1", 'kind': 'seats_opened', 'before': 0, 'available_seats': 1},
+            {'crn': "2", 'kind': 'seats_closed', 'before': 2, 'available_seats': 0},
+            {'crn': "3", 'kind': 'seats_changed', 'before': 2, 'available_seats': 5},
+        ])
+
+    def test_negative_seats_count_as_closed(self):
+        self.assertEqual(self.kinds({"1": course(-1)}, {"1": course(2)}), {("1", 'seats_opened')})
+        self.assertEqual(self.kinds({"1": course(1)}, {"1": course(-2)}), {("1", 'seats_closed')})
+
+    def test_sections_added_and_removed(self):
+        self.assertEqual(diff_catalogs({"1": course(0)}, {"2": course(4)}), [
+            {'crn': "2", 'kind': 'section_added', 'available_seats': 4},
+            {'crn': "1", 'kind': 'section_removed'},
+        ])
+
+    def test_detail_changes(self):
+        changes = diff_catalogs({"1": course(0)}, {"1": course(2, instructor="Jones, M", time="TBA")})
+        self.assertEqual(changes, [
+            {'crn': "1", 'kind': 'seats_opened', 'before': 0, 'available_seats': 2},
+            {'crn': "1", 'kind': 'details_changed',
+             'fields': {'time': ["09:00 am-09:50 am", "TBA"], 'instructor': ["Smith, J", "Jones, M"]}},
+        ])
+
+    def test_section_moved_to_another_course(self):
+        changes = diff_catalogs({"1": course(2)}, {"1": course(2, subject="MATH", course_number="101")})
+        self.assertEqual(changes, [
+            {'crn': "1", 'kind': 'details_changed',
+             'fields': {'subject': ["ECO", "MATH"], 'course_number': ["201", "101"]}},
+        ])
+
+    def test_accepts_plain_dicts(self):
+        old = {"1": dict(course(0))}
+        new = {"1": dict(course(3))}
+        self.assertEqual(self.kinds(old, new), {("1", 'seats_opened')})
+
+
+class ChangeFeedTest(unittest.TestCase):
+
+    def test_changes_since_a_version(self):
+        feed = ChangeFeed()
+        feed.append(2, 100.0, [{'crn': "1", 'kind': 'seats_opened'}])
+        feed.append(3, 200.0, [{'crn': "2", 'kind': 'section_removed'}])
+        changes, complete = feed.since(2)
+        self.assertTrue(complete)
+        self.assertEqual(changes, [{'crn': "2", 'kind': 'section_removed', 'version': 3, 'fetched_at': 200.0}])
+        self.assertEqual(feed.since(3), ([], True))
+
+    def test_incomplete_once_history_is_dropped(self):
+        feed = ChangeFeed(maxlen=2)
+        for version in (2, 3, 4):
+            feed.append(version, float(version), [{'crn': str(version), 'kind': 'seats_changed'}])
+        changes, complete = feed.since(1)
+        self.assertFalse(complete)
+        self.assertEqual([change['version'] for change in changes], [3, 4])
+        self.assertTrue(feed.since(2)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
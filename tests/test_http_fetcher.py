@@ -0,0 +1,91 @@
+"""CatalogSession against the offline fixture server (no network, no browser)"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from course_parser import parse_course_table, parse_form_fields
+from fixture_server import TERM_FIELD, start_server
+from http_fetcher import CatalogSession
+from registrar_guard import RegistrarGuard
+
+
+class CatalogSessionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = start_server(terms=("202610", "202620"))
+        cls.etag_server, cls.etag_url = start_server(terms=("202610", "202620"), etag=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.etag_server.shutdown()
+
+    def session(self, url, **kwargs):
+        session = CatalogSession(url, timeout=5, **kwargs)
+        self.addCleanup(session.close)
+        return session
+
+    def test_get_returns_the_catalog_page(self):
+        html = self.session(self.url).fetch()
+        self.assertGreater(len(parse_course_table(html)), 100)
+
+    def test_unchanged_page_is_not_fetched_again(self):
+        session = self.session(self.etag_url)
+        self.assertIsNotNone(session.fetch())
+        self.assertIsNone(session.fetch())
+
+    def test_validators_are_kept_only_for_pages_that_parse(self):
+        session = self.session(self.etag_url)
+
+        def reject(html):
+            raise ValueError("No data rows found in course table")
+
+        with self.assertRaises(ValueError):
+            session.fetch(parse=reject)
+        self.assertGreater(len(session.fetch(parse=parse_course_table)), 100)  # Not a 304
+        self.assertEqual(session.fetch(parse=lambda html: html or "not modified"), "not modified")
+
+    def test_page_parsed_to_nothing_is_fetched_again(self):
+        session = self.session(self.etag_url)
+        self.assertEqual(session.fetch(parse=lambda html: {}), {})
+        self.assertIsNotNone(session.fetch())
+
+    def test_without_validators_every_get_returns_the_page(self):
+        session = self.session(self.url)
+        session.fetch()
+        self.assertIsNotNone(session.fetch())
+
+    def test_term_postback_selects_the_term(self):
+        html = self.session(self.url, term="202620").fetch()
+        _, selects = parse_form_fields(html)
+        self.assertEqual(selects[TERM_FIELD]["selected"], "202620")
+        self.assertGreater(len(parse_course_table(html)), 100)
+
+    def test_term_already_selected_skips_the_postback(self):
+        guard = self.guard()
+        self.session(self.url, term="202610", guard=guard).fetch()
+        self.assertEqual(guard.status()["tokens"], 4)
+
+    def test_unknown_term_raises(self):
+        with self.assertRaisesRegex(Exception, "not offered"):
+            self.session(self.url, term="199910").fetch()
+
+    def test_each_request_takes_one_token(self):
+        guard = self.guard()
+        self.session(self.url, term="202620", guard=guard).fetch()
+        self.assertEqual(guard.status()["tokens"], 3)
+        self.assertEqual(guard.status()["state"], "closed")
+
+    def guard(self):
+        path = os.path.join(tempfile.mkdtemp(), "guard.db")
+        # A bucket that refills about once a day, so tokens count requests exactly
+        return RegistrarGuard(path, max_requests_per_hour=0.04, burst=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""LeaderLease handover between processes sharing one database"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from store import LeaderLease
+
+
+class LeaderLeaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "lease.db")
+
+    def lease(self, ttl=60):
+        lease = LeaderLease(self.path, ttl=ttl)
+        self.addCleanup(lease.close)
+        return lease
+
+    def test_only_one_holder(self):
+        first, second = self.lease(), self.lease()
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(first.acquire())  # Renewing keeps it
+        self.assertTrue(first.held())
+        self.assertFalse(second.held())
+        self.assertEqual(second.current()[0], first.holder)
+
+    def test_release_hands_over(self):
+        first, second = self.lease(), self.lease()
+        first.acquire()
+        first.release()
+        self.assertIsNone(second.current())
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.acquire())
+
+    def test_release_by_a_non_holder_does_nothing(self):
+        first, second = self.lease(), self.lease()
+        first.acquire()
+        second.release()
+        self.assertTrue(first.held())
+
+    def test_expired_lease_is_taken_over(self):
+        first, second = self.lease(ttl=0.2), self.lease(ttl=0.2)
+        first.acquire()
+        self.assertFalse(second.acquire())
+        time.sleep(0.3)
+        self.assertIsNone(first.current())
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.acquire())
+
+    def test_leases_are_independent_by_name(self):
+        poller = self.lease()
+        other = LeaderLease(self.path, name="other-job")
+        self.addCleanup(other.close)
+        self.assertTrue(poller.acquire())
+        self.assertTrue(other.acquire())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""Notifier retries and reconnects against a local SMTP stand-in"""
+
+import os
+import socketserver
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import notifier
+from notifier import Notifier, Outbox
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough SMTP for smtplib: no AUTH, no TLS.
+
+    The first `reject` messages get a 451 after DATA, and with
+    `drop_after_message` the server hangs up after every accepted message,
+    like a server closing a kept-alive connection.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, reject=0, drop_after_message=False):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.reject = reject
+        self.drop_after_message = drop_after_message
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 stand-in ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip("<> "))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with server.lock:
+                    rejected = server.reject > 0
+                    if rejected:
+                        server.reject -= 1
+                    else:
+                        server.messages.extend(recipients)
+                if rejected:
+                    self.reply("451 Try again later")
+                    continue
+                self.reply("250 Queued")
+                if server.drop_after_message:
+                    return
+            elif verb in ("NOOP", "RSET"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+class NotifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "outbox.db")
+        self.outbox = Outbox(self.path, max_attempts=3)
+        self.addCleanup(self.outbox.close)
+        for patcher in (mock.patch.dict(os.environ, SENDER_EMAIL="openseat@example.com", SENDER_PASSWORD="x"),
+                        mock.patch.object(notifier, "SMTP_HOST", "127.0.0.1"),
+                        mock.patch.object(notifier, "SMTP_SSL", False),
+                        # Retry at once instead of after several seconds of backoff
+                        mock.patch.object(notifier, "backoff_delay", lambda attempt, base, cap: 0.0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def serve(self, **kwargs):
+        server = SMTPStandIn(**kwargs)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        mock_port = mock.patch.object(notifier, "SMTP_PORT", server.port)
+        mock_port.start()
+        self.addCleanup(mock_port.stop)
+        return server
+
+    def start_notifier(self):
+        sender = Notifier(self.outbox, workers=1, poll_interval=0.05)
+        sender.start()
+        self.addCleanup(sender.stop, 5)
+        return sender
+
+    def attempts(self):
+        """{recipient: (status, failed attempts)} straight from the outbox table"""
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute("SELECT recipient, status, attempts FROM outbox").fetchall()
+        return {recipient: (status, attempts) for recipient, status, attempts in rows}
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.time() + timeout
+        while not condition():
+            if time.time() > deadline:
+                self.fail("timed out")
+            time.sleep(0.02)
+
+    def test_sends_queued_messages(self):
+        server = self.serve()
+        sender = self.start_notifier()
+        for i in range(3):
+            sender.enqueue(f"student{i}@example.com", "Seat open", "CRN 12345 has a seat")
+        self.wait_for(lambda: self.outbox.depth() == 0)
+        self.assertEqual(sorted(server.messages), [f"student{i}@example.com" for i in range(3)])
+        self.assertEqual(server.connections, 1)
+
+    def test_rejected_message_is_retried(self):
+        server = self.serve(reject=1)
+        sender = self.start_notifier()
+        sender.enqueue("student@example.com", "Seat open", "CRN 12345 has a seat")
+        self.wait_for(lambda: server.messages)
+        self.wait_for(lambda: self.outbox.depth() == 0)
+        self.assertEqual(server.messages, ["student@example.com"])
+        self.assertEqual(self.attempts(), {"student@example.com": ("sent", 1)})
+
+    def test_gives_up_after_max_attempts(self):
+        server = self.serve(reject=10)
+        sender = self.start_notifier()
+        sender.enqueue("student@example.com", "Seat open", "CRN 12345 has a seat")
+        self.wait_for(lambda: self.outbox.depth() == 0)
+        self.assertEqual(server.messages, [])
+        self.assertEqual(server.reject, 7)  # Three attempts, then no more
+        self.assertEqual(self.attempts(), {"student@example.com": ("failed", 3)})
+
+    def test_reconnects_when_the_server_hangs_up(self):
+        server = self.serve(drop_after_message=True)
+        sender = self.start_notifier()
+        for i in range(2):
+            sender.enqueue(f"student{i}@example.com", "Seat open", "CRN 12345 has a seat")
+        self.wait_for(lambda: self.outbox.depth() == 0)
+        self.assertEqual(sorted(server.messages), ["student0@example.com", "student1@example.com"])
+        self.assertEqual(server.connections, 2)
+        # Resent on a new connection right away, not counted as a failed attempt
+        self.assertEqual(set(self.attempts().values()), {("sent", 0)})
+
+    def test_stop_with_drain_sends_due_messages(self):
+        server = self.serve()
+        sender = Notifier(self.outbox, workers=1, poll_interval=0.05)
+        sender.enqueue("student@example.com", "Seat open", "CRN 12345 has a seat")
+        sender.start()
+        sender.stop(5, drain=True)
+        self.assertEqual(server.messages, ["student@example.com"])
+        self.assertEqual(self.outbox.depth(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
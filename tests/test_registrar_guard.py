@@ -0,0 +1,108 @@
+"""RegistrarGuard circuit breaker and token bucket"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from registrar_guard import CLOSED, HALF_OPEN, OPEN, RegistrarGuard, RegistrarUnavailable
+
+
+class RegistrarGuardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "guard.db")
+
+    def guard(self, **kwargs):
+        # No rate limit unless a test sets one, and cooldowns short enough to wait out
+        options = dict(max_requests_per_hour=0, failure_threshold=2, cooldown=0.2, max_cooldown=0.5,
+                       probe_timeout=0.3)
+        options.update(kwargs)
+        guard = RegistrarGuard(self.path, **options)
+        self.addCleanup(guard.close)
+        return guard
+
+    def record_failures(self, guard, times=1):
+        for _ in range(times):
+            guard.acquire()
+            guard.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        guard = self.guard()
+        self.record_failures(guard)
+        self.assertEqual(guard.status()['state'], CLOSED)
+        self.record_failures(guard)
+        self.assertEqual(guard.status()['state'], OPEN)
+        with self.assertRaisesRegex(RegistrarUnavailable, "circuit breaker is open"):
+            guard.acquire()
+        with self.assertRaises(RegistrarUnavailable):
+            guard.check()
+
+    def test_success_resets_the_failure_count(self):
+        guard = self.guard()
+        self.record_failures(guard)
+        guard.acquire()
+        guard.record_success()
+        self.record_failures(guard)
+        self.assertEqual(guard.status()['state'], CLOSED)
+        self.assertEqual(guard.status()['consecutive_failures'], 1)
+
+    def test_one_probe_after_cooldown_then_closes(self):
+        guard = self.guard()
+        self.record_failures(guard, 2)
+        time.sleep(0.25)
+        guard.acquire()
+        self.assertEqual(guard.status()['state'], HALF_OPEN)
+        with self.assertRaisesRegex(RegistrarUnavailable, "probe request in progress"):
+            guard.acquire()
+        guard.record_success()
+        self.assertEqual(guard.status()['state'], CLOSED)
+        guard.acquire()
+
+    def test_failed_probe_reopens_for_longer(self):
+        guard = self.guard()
+        self.record_failures(guard, 2)
+        time.sleep(0.25)
+        self.record_failures(guard)
+        status = guard.status()
+        self.assertEqual(status['state'], OPEN)
+        self.assertGreater(status['retry_in'], 0.3)  # Twice the 0.2s cooldown
+        time.sleep(0.45)
+        self.record_failures(guard)
+        self.assertLessEqual(guard.status()['retry_in'], 0.5)  # Capped at max_cooldown
+
+    def test_probe_that_never_reports_frees_the_slot(self):
+        guard = self.guard()
+        self.record_failures(guard, 2)
+        time.sleep(0.25)
+        guard.acquire()
+        time.sleep(0.35)
+        guard.acquire()  # A new probe after probe_timeout
+        self.assertEqual(guard.status()['state'], HALF_OPEN)
+
+    def test_request_records_the_outcome(self):
+        guard = self.guard()
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                with guard.request():
+                    raise ValueError("page did not load")
+        self.assertEqual(guard.status()['state'], OPEN)
+
+    def test_bucket_limits_requests(self):
+        guard = self.guard(max_requests_per_hour=1, burst=2)
+        guard.check()  # Does not take a token
+        guard.acquire()
+        guard.acquire()
+        with self.assertRaisesRegex(RegistrarUnavailable, "budget spent") as refused:
+            guard.acquire()
+        self.assertGreater(refused.exception.retry_after, 3000)
+
+    def test_state_is_shared_through_the_database(self):
+        first, second = self.guard(), self.guard()
+        self.record_failures(first, 2)
+        with self.assertRaises(RegistrarUnavailable):
+            second.acquire()
+
+
+if __name__ == "__main__":
+    unittest.main()
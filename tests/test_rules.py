@@ -0,0 +1,132 @@
+"""Watch rule validation, the indexed candidate query and matching in the poller"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from catalog import CatalogCache, Course
+from config import Config
+from monitor import Monitor
+from rules import make_rule, rule_accepts
+from store import LeaderLease, SubscriptionStore, WatchRuleStore
+
+
+def section(seats, subject="ECO", course_number="201", instructor="Smith, John", days="MWF",
+            time="09:00 am-09:50 am"):
+    return Course(subject, course_number, "Principles of Economics", days, time, instructor, seats)
+
+
+class MakeRuleTest(unittest.TestCase):
+
+    def test_normalizes_fields(self):
+        rule = make_rule({'subject': ' eco ', 'course_number': '201', 'instructor': ' Smith,   John ',
+                          'days': 'm w f', 'time': '09:00 AM', 'min_seats': '2'})
+        self.assertEqual(rule, {'crn': None, 'subject': 'ECO', 'course_number': '201',
+                                'instructor': 'smith, john', 'days': 'MWF', 'time': '09:00am', 'min_seats': 2})
+
+    def test_min_seats_defaults_to_one(self):
+        self.assertEqual(make_rule({'crn': 12345})['min_seats'], 1)
+        self.assertEqual(make_rule({'crn': '12345', 'min_seats': ''})['min_seats'], 1)
+
+    def test_rejects_bad_rules(self):
+        for data in ({}, {'days': 'MWF'}, {'subject': 'ECO'}, {'course_number': '201'},
+                     {'crn': '1', 'min_seats': 'two'}, {'crn': '1', 'min_seats': 0},
+                     {'crn': '1', 'min_seats': -1}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                make_rule(data)
+
+    def test_rule_accepts_every_condition(self):
+        rule = make_rule({'instructor': 'smith, john', 'days': 'MWF', 'time': '09:00', 'min_seats': 2})
+        self.assertTrue(rule_accepts(rule, "1", section(2)))
+        self.assertFalse(rule_accepts(rule, "1", section(1)))
+        self.assertFalse(rule_accepts(rule, "1", section(2, days="TR")))
+        self.assertFalse(rule_accepts(rule, "1", section(2, time="10:00 am-10:50 am")))
+        self.assertFalse(rule_accepts(rule, "1", section(2, instructor="Jones, Mary")))
+
+
+class WatchRuleStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = WatchRuleStore(os.path.join(tempfile.mkdtemp(), "rules.db"))
+        self.addCleanup(self.rules.close)
+
+    def add(self, email, **data):
+        return self.rules.add({'name': 'Student', 'email': email}, make_rule(data))
+
+    def test_candidates_are_keyed_on_crn_course_and_instructor(self):
+        by_crn = self.add("a@example.com", crn="1")
+        by_course = self.add("b@example.com", subject="ECO", course_number="201")
+        by_instructor = self.add("c@example.com", instructor="SMITH, JOHN", days="TR")
+        self.add("d@example.com", crn="2")
+        self.add("e@example.com", subject="ECO", course_number="202")
+        self.add("f@example.com", instructor="Jones, Mary")
+
+        candidates = self.rules.candidates("1", section(3))
+        self.assertEqual([rule['rule_id'] for rule in candidates], [by_crn, by_course, by_instructor])
+        # The index only narrows the search; the conditions are still checked per rule
+        self.assertEqual([rule['rule_id'] for rule in candidates if rule_accepts(rule, "1", section(3))],
+                         [by_crn, by_course])
+
+    def test_duplicate_rule_is_not_added(self):
+        self.assertIsNotNone(self.add("a@example.com", crn="1", min_seats=2))
+        self.assertIsNone(self.add("a@example.com", crn="1", min_seats=2))
+        self.assertIsNotNone(self.add("a@example.com", crn="1", min_seats=3))
+        self.assertIsNotNone(self.add("b@example.com", crn="1", min_seats=2))
+        self.assertEqual(len(self.rules), 3)
+
+
+class RuleMatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), "openseat.db")
+        self.catalogs = []
+        patcher = mock.patch.object(Config, "DATABASE_PATH", path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.rules = WatchRuleStore(path)
+        cache = CatalogCache(lambda: self.catalogs.pop(0))
+        self.monitor = Monitor(Config, SubscriptionStore(path), cache, LeaderLease(path), rules=self.rules)
+        self.monitor.poller.interval = 0  # Scrape on every cycle
+        self.addCleanup(self.monitor.fanout.shutdown)
+        self.addCleanup(self.monitor.notifier.outbox.close)
+
+    def poll(self, courses):
+        self.catalogs.append(courses)
+        self.monitor.poller.run_once()
+        deadline = time.time() + 5
+        while self.monitor.fanout.pending():
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_rule_fires_once_then_is_removed(self):
+        self.rules.add({'name': 'Student', 'email': 'a@example.com'},
+                       make_rule({'subject': 'ECO', 'course_number': '201', 'min_seats': 2}))
+        other = self.rules.add({'name': 'Student', 'email': 'b@example.com'},
+                               make_rule({'instructor': 'Jones, Mary'}))
+        self.poll({"1": section(0), "2": section(5, subject="MATH", course_number="101")})
+        self.assertEqual(self.monitor.notifier.outbox.depth(), 0)
+
+        self.poll({"1": section(1), "2": section(5, subject="MATH", course_number="101")})
+        self.assertEqual(self.monitor.notifier.outbox.depth(), 0)  # Below min_seats
+
+        self.poll({"1": section(3), "2": section(5, subject="MATH", course_number="101")})
+        self.assertEqual(self.monitor.notifier.outbox.depth(), 1)
+        self.assertEqual([rule['rule_id'] for rule in self.rules.all()], [other])
+
+        self.poll({"1": section(4), "2": section(5, subject="MATH", course_number="101")})
+        self.assertEqual(self.monitor.notifier.outbox.depth(), 1)
+
+    def test_new_rule_matches_a_section_that_is_already_open(self):
+        self.rules.add({'name': 'Student', 'email': 'b@example.com'}, make_rule({'crn': '3'}))
+        self.poll({"1": section(0), "2": section(2, instructor="Jones, Mary")})
+        self.rules.add({'name': 'Student', 'email': 'a@example.com'}, make_rule({'instructor': 'jones, mary'}))
+        self.poll({"1": section(0), "2": section(2, instructor="Jones, Mary")})
+        self.assertEqual(self.monitor.notifier.outbox.depth(), 1)
+        self.assertEqual(len(self.rules), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
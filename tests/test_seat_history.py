@@ -0,0 +1,88 @@
+"""Run-length encoded seat history and the opening statistics built from it"""
+
+import os
+import tempfile
+import unittest
+
+from catalog import CatalogSnapshot, Course
+from store import SeatHistory, seat_openings
+
+
+def snapshot(version, at, seats):
+    """Catalog at time `at` with {crn: available seats}"""
+    return CatalogSnapshot({crn: Course("ECO", "201", "Economics", "MWF", "9", "Smith, J", count)
+                            for crn, count in seats.items()}, version, at)
+
+
+class SeatHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "history.db")
+        self.history = SeatHistory(self.path)
+        self.addCleanup(self.history.close)
+
+    def test_runs_split_only_when_seats_change(self):
+        self.assertEqual(self.history.record(snapshot(1, 100.0, {"1": 0, "2": 3})), 2)
+        self.assertEqual(self.history.record(snapshot(2, 200.0, {"1": 0, "2": 3})), 0)
+        self.assertEqual(self.history.record(snapshot(3, 300.0, {"1": 2, "2": 3})), 1)
+        self.assertEqual(self.history.runs("1", until=1000), [(0, 100.0, 300.0), (2, 300.0, None)])
+        self.assertEqual(self.history.runs("2", until=1000), [(3, 100.0, None)])
+        self.assertEqual(self.history.subject_runs("ECO", since=250, until=1000),
+                         {"1": [(0, 100.0, 300.0), (2, 300.0, None)], "2": [(3, 100.0, None)]})
+
+    def test_removed_and_readded_sections(self):
+        self.history.record(snapshot(1, 100.0, {"1": 1, "2": 0}))
+        self.assertEqual(self.history.record(snapshot(2, 200.0, {"2": 0})), 1)
+        self.history.record(snapshot(3, 300.0, {"1": 1, "2": 0}))
+        self.assertEqual(self.history.runs("1", until=1000), [(1, 100.0, 200.0), (1, 300.0, None)])
+
+    def test_open_runs_are_reloaded_by_a_new_process(self):
+        self.history.record(snapshot(1, 100.0, {"1": 0}))
+        other = SeatHistory(self.path)
+        self.addCleanup(other.close)
+        self.assertEqual(other.record(snapshot(2, 200.0, {"1": 0})), 0)
+        other.record(snapshot(3, 300.0, {"1": 4}))
+        self.history.reset()
+        self.assertEqual(self.history.record(snapshot(4, 400.0, {"1": 4})), 0)
+        self.assertEqual(self.history.runs("1", until=1000), [(0, 100.0, 300.0), (4, 300.0, None)])
+
+
+class SeatOpeningsTest(unittest.TestCase):
+
+    # Full, open 100-300 (2 then 1 seats), full, open again 500 onwards
+    RUNS = [(0, 0.0, 100.0), (2, 100.0, 200.0), (1, 200.0, 300.0), (0, 300.0, 500.0), (3, 500.0, None)]
+
+    def test_consecutive_runs_with_seats_are_one_opening(self):
+        stats = seat_openings(self.RUNS[:4], until=600.0)
+        self.assertEqual(stats['openings'], 1)
+        self.assertEqual(stats['median_open_seconds'], 200.0)
+        self.assertFalse(stats['open_now'])
+        self.assertEqual(sum(stats['openings_by_hour']), 1)
+
+    def test_opening_still_open_lasts_until_now(self):
+        stats = seat_openings(self.RUNS, until=1000.0)
+        self.assertEqual(stats['openings'], 2)
+        self.assertEqual(stats['max_open_seconds'], 500.0)
+        self.assertEqual(stats['median_open_seconds'], 500.0)  # Upper median of 200 and 500
+        self.assertTrue(stats['open_now'])
+        self.assertEqual(stats['open_seconds'], 700.0)
+
+    def test_opening_before_since_is_not_counted(self):
+        # runs(crn, since=150) starts with the run that was already open at 150
+        stats = seat_openings(self.RUNS[1:], since=150.0, until=1000.0)
+        self.assertEqual(stats['openings'], 1)
+        self.assertEqual(stats['open_seconds'], 650.0)  # 150-300 and 500-1000
+        # Full at `since` and opened inside the range: counted
+        self.assertEqual(seat_openings(self.RUNS, since=50.0, until=1000.0)['openings'], 2)
+
+    def test_no_openings(self):
+        stats = seat_openings([(0, 0.0, None)], until=100.0)
+        self.assertEqual(stats['openings'], 0)
+        self.assertIsNone(stats['median_open_seconds'])
+        self.assertIsNone(stats['max_open_seconds'])
+        self.assertEqual(stats['open_seconds'], 0.0)
+        self.assertEqual(seat_openings([])['openings'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Standalone catalog monitor.
+
+Runs the poller and SMTP workers outside the web server, e.g. next to a
+development server. Every process shares state through the SQLite file at
+DATABASE_PATH, so this must run on the same machine (or container, with the
+same volume) as the web server; a separate service with its own disk would
+poll and send emails from a database the web server never sees. Set
+EMBEDDED_MONITOR=0 on the web server to leave polling to this process; if
+several monitors run anyway, the leader lease keeps only one of them polling.
+
+Usage: python worker.py
+"""
+
+import logging
+import signal
+import threading
+
+from config import Config
+from monitor import create_monitor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    monitor = create_monitor(Config, legacy_json="user_requests.json")
+
+    # SIGTERM (sent by Railway on redeploy) and Ctrl-C both shut down cleanly
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: stop.set())
+
+    monitor.start()
+    logger.info(f"Started Open Seat monitor worker (lease {monitor.lease.holder})")
+    stop.wait()
+    logger.info("Shutting down monitor worker")
+    monitor.shutdown(timeout=Config.SHUTDOWN_TIMEOUT)
+
+
+if __name__ == '__main__':
+    main()